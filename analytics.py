@@ -0,0 +1,112 @@
+import threading
+from collections import Counter
+from datetime import datetime
+
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def _classified(complaint):
+    """Whether the complaint carries classifier labels; fast path templates may skip the classifiers"""
+    return complaint.get("sentiment") is not None
+
+
+class ComplaintAnalytics:
+    """Running complaint counters for the /analytics dashboard.
+
+    The counters follow complaint storage. Each snapshot first counts the
+    records appended since the last one, by this or any other process, so
+    its cost depends on how many complaints are new, not on how many have
+    been stored.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Storage position of the last counted complaint
+        self._position = None
+        self.total = 0
+        self.urgent = 0
+        self.fraud = 0
+        self.categories = Counter()
+        self.sentiments = Counter()
+        self.urgencies = Counter()
+        self.frauds = Counter()
+        self.months = Counter()
+
+    def _add(self, complaint):
+        self.total += 1
+        self.categories[complaint["category"]] += 1
+        if _classified(complaint):
+            self.sentiments[complaint["sentiment"]] += 1
+            urgency = complaint.get("urgency") or ""
+            fraud = complaint.get("fraud") or ""
+            self.urgencies[urgency] += 1
+            self.frauds[fraud] += 1
+            if urgency.lower() == "high":
+                self.urgent += 1
+            if fraud.lower() == "fraud":
+                self.fraud += 1
+        complaint_date = datetime.fromtimestamp(complaint["timestamp"])
+        self.months[(complaint_date.year, complaint_date.month)] += 1
+
+    def refresh(self):
+        """Count the complaints appended to storage since the last refresh"""
+        with self._lock:
+            self._catch_up()
+
+    def rebuild(self):
+        """Recount everything in storage"""
+        with self._lock:
+            self._reset()
+            self._catch_up()
+
+    def _catch_up(self):
+        for position, complaint in self.storage.scan(self._position):
+            self._add(complaint)
+            self._position = position
+
+    def snapshot(self, now=None):
+        """Return the /analytics payload, counting newly stored complaints first"""
+        with self._lock:
+            self._catch_up()
+            if not self.total:
+                return {
+                    "totalComplaints": 0,
+                    "resolvedPercentage": 0,
+                    "urgentCases": 0,
+                    "fraudCases": 0,
+                    "avgResponseTime": 0,
+                    "categoryCounts": {},
+                    "sentimentCounts": {},
+                    "urgencyCounts": {},
+                    "fraudCounts": {},
+                    "monthlyComplaints": [{"name": name, "count": 0} for name in MONTH_NAMES[:6]]
+                }
+
+            # Look back 6 months
+            now = now or datetime.now()
+            monthly_data = []
+            for i in range(5, -1, -1):
+                month_idx = (now.month - 1 - i) % 12
+                target_year = now.year - 1 if now.month - i <= 0 else now.year
+                monthly_data.append({
+                    "name": MONTH_NAMES[month_idx],
+                    "count": self.months.get((target_year, month_idx + 1), 0)
+                })
+
+            return {
+                "totalComplaints": self.total,
+                "resolvedPercentage": 100,  # Assuming all are resolved
+                "urgentCases": self.urgent,
+                "fraudCases": self.fraud,
+                # Assuming immediate response for now, would need timestamp of when response was generated vs submitted
+                "avgResponseTime": 2.4,
+                "categoryCounts": dict(self.categories),
+                "sentimentCounts": dict(self.sentiments),
+                "urgencyCounts": dict(self.urgencies),
+                "fraudCounts": dict(self.frauds),
+                "monthlyComplaints": monthly_data
+            }
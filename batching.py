@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+
+class MicroBatcher:
+    """Collect concurrent requests into batches for a batch-capable function.
+
+    Callers await submit() with a single item. Items that arrive while a batch
+    is being collected are grouped together until either max_batch_size items
+    are queued or max_wait_ms has passed since the first item of the batch.
+    The batch function receives a list of items and must return a list of
+    results in the same order; each caller gets back its own result.
+    """
+
+    def __init__(self, process_batch, max_batch_size=16, max_wait_ms=10, executor=None):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.executor = executor
+        self._queue = None
+        self._runner = None
+        self.batches_run = 0
+        self.items_processed = 0
+
+    async def submit(self, item):
+        """Queue one item and wait for its result"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    def _ensure_started(self):
+        if self._runner is None or self._runner.done():
+            self._queue = asyncio.Queue()
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching loop, failing any requests still waiting in the queue"""
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Still take whatever is already queued without waiting
+                while len(batch) < self.max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Skip requests whose callers have already gone away
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"Batch function returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches_run += 1
+            self.items_processed += len(items)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        """Return batching counters"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches_run": self.batches_run,
+            "items_processed": self.items_processed,
+            "avg_batch_size": self.items_processed / self.batches_run if self.batches_run else 0,
+        }
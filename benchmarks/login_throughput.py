@@ -0,0 +1,116 @@
+"""Measure login throughput against a user store holding many users.
+
+Fills a temporary UserStore (1M users by default; every user shares one
+precomputed hash so filling does not take hours), then runs concurrent
+logins the way /login does: a primary-key lookup on the I/O pool followed by
+password verification on the hashing pool.
+
+    python benchmarks/login_throughput.py --users 1000000 --logins 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from executors import InstrumentedExecutor  # noqa: E402
+from user_store import UserStore, hash_password, verify_password  # noqa: E402
+
+FILL_BATCH = 50000
+PASSWORD = "correct horse battery staple"
+
+
+def fill(store, users, password_hash):
+    started = time.perf_counter()
+    for start in range(0, users, FILL_BATCH):
+        store.add_many([
+            (f"user{i}", f"user{i}@example.com", password_hash, 1700000000.0)
+            for i in range(start, min(users, start + FILL_BATCH))
+        ])
+    return time.perf_counter() - started
+
+
+async def run_logins(store, users, logins, concurrency, io_executor, hash_executor):
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(logins):
+        queue.put_nowait(f"user{random.randrange(users)}@example.com")
+
+    async def worker():
+        while not queue.empty():
+            email = queue.get_nowait()
+            started = time.perf_counter()
+            user = await io_executor.run(store.get, email)
+            assert await hash_executor.run(verify_password, PASSWORD, user["password_hash"])
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "logins": logins,
+        "concurrency": concurrency,
+        "logins_per_second": round(logins / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)], 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+    }
+
+
+def time_lookups(store, users, samples):
+    started = time.perf_counter()
+    for _ in range(samples):
+        assert store.get(f"user{random.randrange(users)}@example.com") is not None
+    return round((time.perf_counter() - started) / samples * 1000, 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--logins", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000")))
+    parser.add_argument("--hash-workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--io-workers", type=int, default=4)
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--output", default=None, help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(dir=args.workdir)
+    io_executor = InstrumentedExecutor("io", args.io_workers)
+    hash_executor = InstrumentedExecutor("password-hashing", args.hash_workers)
+    try:
+        store = UserStore(os.path.join(workdir, "users.db"))
+        fill_seconds = fill(store, args.users, hash_password(PASSWORD, args.iterations))
+        result = {
+            "users": args.users,
+            "iterations": args.iterations,
+            "hash_workers": args.hash_workers,
+            "fill_seconds": round(fill_seconds, 2),
+            "lookup_ms": time_lookups(store, args.users, 1000),
+            **asyncio.run(run_logins(store, args.users, args.logins, args.concurrency, io_executor, hash_executor)),
+            "hash_pool": hash_executor.stats(),
+        }
+        store.close()
+    finally:
+        io_executor.shutdown()
+        hash_executor.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Measure /get-response storage lookup latency as the complaint history grows.
+
+Fills a temporary store with N synthetic complaints for each size and backend,
+then times random get(complaint_id) calls. For small stores the old full-scan
+lookup is timed as well for comparison.
+
+    python benchmarks/lookup_latency.py --sizes 10000 1000000 10000000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from complaint_storage import STORAGE_BACKENDS, open_storage  # noqa: E402
+
+FILL_BATCH = 10000
+SCAN_LIMIT = 100000
+
+
+def make_record(i):
+    return {
+        "complaint_id": f"AIGV{i:08d}X",
+        "category": "product",
+        "complaint": "The laptop I purchased stopped working after two days and I need a replacement.",
+        "sentiment": "negative",
+        "sentiment_confidence": 0.97,
+        "urgency": "high",
+        "urgency_confidence": 0.88,
+        "fraud": "legit",
+        "fraud_confidence": 0.99,
+        "response": "We sincerely apologize for the issues you're experiencing with your laptop.",
+        "timestamp": 1700000000.0 + i,
+    }
+
+
+def fill(storage, size):
+    started = time.perf_counter()
+    for start in range(0, size, FILL_BATCH):
+        storage.append_many([make_record(i) for i in range(start, min(size, start + FILL_BATCH))])
+    return time.perf_counter() - started
+
+
+def time_lookups(lookup, size, samples):
+    latencies = []
+    for _ in range(samples):
+        complaint_id = make_record(random.randrange(size))["complaint_id"]
+        started = time.perf_counter()
+        record = lookup(complaint_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert record is not None and record["complaint_id"] == complaint_id
+    latencies.sort()
+    return {
+        "samples": samples,
+        "mean_ms": round(statistics.fmean(latencies), 4),
+        "p50_ms": round(latencies[len(latencies) // 2], 4),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)], 4),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 4),
+    }
+
+
+def full_scan_lookup(storage):
+    """The previous /get-response behaviour: load every complaint and scan linearly"""
+    def lookup(complaint_id):
+        for record in list(storage.iter_all()):
+            if record["complaint_id"] == complaint_id:
+                return record
+        return None
+    return lookup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 1000000, 10000000])
+    parser.add_argument("--backends", nargs="+", default=sorted(STORAGE_BACKENDS), choices=sorted(STORAGE_BACKENDS))
+    parser.add_argument("--samples", type=int, default=1000, help="indexed lookups per size")
+    parser.add_argument("--scan-samples", type=int, default=20, help="full-scan lookups for stores up to 100k complaints")
+    parser.add_argument("--workdir", default=None, help="directory for the temporary stores (needs several GB for 10M)")
+    parser.add_argument("--output", default=None, help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for backend in args.backends:
+        for size in args.sizes:
+            workdir = tempfile.mkdtemp(dir=args.workdir)
+            try:
+                storage = open_storage(backend, os.path.join(workdir, f"complaints.{backend}"), fsync=False)
+                fill_seconds = fill(storage, size)
+                result = {
+                    "backend": backend,
+                    "size": size,
+                    "fill_seconds": round(fill_seconds, 2),
+                    "indexed": time_lookups(storage.get, size, args.samples),
+                }
+                if size <= SCAN_LIMIT and args.scan_samples:
+                    result["full_scan"] = time_lookups(full_scan_lookup(storage), size, args.scan_samples)
+                storage.close()
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            results.append(result)
+            print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Throughput of score_corpus.py on a corpus in preprocess.py's format.
+
+Writes --rows generated complaints to a temporary synthetic_complaints.csv,
+with the category, complaint, response and label columns preprocess.py
+writes, then reads, scores and writes it chunk by chunk through
+score_corpus's own functions in this process. By default classify_batch is a
+stand-in that returns fixed labels, so the run measures reading, joining and
+Parquet writing. With --models local the real classifiers are loaded from the
+working directory. Fails unless every part file holds the input columns, the
+source row and the prefixed predictions.
+
+    python benchmarks/offline_scoring.py --rows 100000 --chunk-size 10000
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import score_corpus  # noqa: E402
+from preprocess import generate_complaints  # noqa: E402
+
+
+def stub_classify_batch(texts):
+    return [
+        {
+            "sentiment": "Negative", "sentiment_confidence": 0.9,
+            "urgency": "Not Urgent", "urgency_confidence": 0.9,
+            "fraud": "Not Fraud", "fraud_confidence": 0.9,
+        }
+        for _ in texts
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="complaints generated with preprocess.py")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--models", default="stub", choices=["stub", "local"])
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--output", default=None, help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.models == "stub":
+        score_corpus.classify_batch = stub_classify_batch
+    else:
+        score_corpus.init_worker(os.cpu_count() or 1)
+
+    workdir = tempfile.mkdtemp(dir=args.workdir)
+    try:
+        corpus_path = os.path.join(workdir, "synthetic_complaints.csv")
+        corpus = pd.DataFrame(generate_complaints(args.rows))
+        corpus.to_csv(corpus_path, index=False)
+        output_dir = os.path.join(workdir, "scored")
+        os.makedirs(output_dir)
+
+        started = time.perf_counter()
+        scored = 0
+        for index, chunk in enumerate(score_corpus.read_chunks(corpus_path, args.chunk_size)):
+            rows, texts = score_corpus.chunk_rows(chunk, "complaint")
+            scored += score_corpus.score_chunk(index, rows, texts, args.batch_size, output_dir)[1]
+        elapsed = time.perf_counter() - started
+
+        parts = sorted(glob.glob(os.path.join(output_dir, "part-*.parquet")))
+        scored_frame = pd.concat([pd.read_parquet(path) for path in parts], ignore_index=True)
+        expected = list(corpus.columns) + [score_corpus.ROW_COLUMN] + score_corpus.PREDICTION_COLUMNS
+        if list(scored_frame.columns) != expected:
+            raise RuntimeError(f"expected columns {expected}, got {list(scored_frame.columns)}")
+        if scored_frame[score_corpus.ROW_COLUMN].tolist() != list(range(args.rows)):
+            raise RuntimeError("source rows are missing or out of order")
+        # The input's own labels are kept next to the predictions
+        if scored_frame["sentiment"].tolist() != corpus["sentiment"].tolist():
+            raise RuntimeError("input sentiment labels were not kept")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "models": args.models,
+        "rows": scored,
+        "parts": len(parts),
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(scored / elapsed, 1),
+    }
+    print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
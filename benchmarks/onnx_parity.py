@@ -0,0 +1,142 @@
+"""Check that the ONNX Runtime exports match the PyTorch models and compare their latency.
+
+For each classifier exported with export_onnx.py it runs the PyTorch and ONNX
+Runtime models on the train_step2.py held-out slice of synthetic_complaints.csv
+and reports how often the predicted classes agree, the largest absolute logit
+difference and the batch latency of both. For the response model it compares
+greedy generations token by token and times them. Exits non-zero when the
+classifier agreement or logit difference is outside the tolerances.
+
+    python benchmarks/onnx_parity.py --samples 500 --onnx-dir onnx_models
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import pandas as pd
+import torch
+from transformers import DistilBertForSequenceClassification, DistilBertTokenizer, GPT2LMHeadModel, GPT2Tokenizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from onnx_backend import DEFAULT_EXPORT_DIR, has_onnx_model, load_onnx_causal_lm, load_onnx_classifier  # noqa: E402
+
+CLASSIFIERS = ["sentiment", "urgency", "fraud"]
+
+
+def held_out_texts(csv_path, samples, test_size=0.1):
+    """Complaint texts from the test split used by train_step2.py"""
+    df = pd.read_csv(csv_path)
+    df_shuffled = df.sample(frac=1, random_state=42)
+    return df_shuffled[:int(len(df) * test_size)]["complaint"][:samples].tolist()
+
+
+def batch_logits(model, tokenizer, texts, batch_size):
+    logits = []
+    latencies = []
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            inputs = tokenizer(texts[start:start + batch_size], return_tensors="pt", padding=True, truncation=True)
+            started = time.perf_counter()
+            logits.append(model(**inputs).logits.float())
+            latencies.append((time.perf_counter() - started) * 1000)
+    return torch.cat(logits), statistics.fmean(latencies)
+
+
+def compare_classifier(name, onnx_path, tokenizer, texts, batch_size):
+    torch_model = DistilBertForSequenceClassification.from_pretrained(f"./{name}_model").eval()
+    onnx_model = load_onnx_classifier(onnx_path)
+    torch_logits, torch_latency = batch_logits(torch_model, tokenizer, texts, batch_size)
+    onnx_logits, onnx_latency = batch_logits(onnx_model, tokenizer, texts, batch_size)
+    return {
+        "model": name,
+        "samples": len(texts),
+        "batch_size": batch_size,
+        "agreement": round((torch_logits.argmax(-1) == onnx_logits.argmax(-1)).float().mean().item(), 4),
+        "max_abs_logit_diff": round((torch_logits - onnx_logits).abs().max().item(), 6),
+        "torch_batch_latency_ms": round(torch_latency, 2),
+        "onnx_batch_latency_ms": round(onnx_latency, 2),
+        "speedup": round(torch_latency / onnx_latency, 2),
+    }
+
+
+def greedy_generations(model, tokenizer, prompts, new_tokens):
+    outputs = []
+    latencies = []
+    with torch.no_grad():
+        for prompt in prompts:
+            inputs = tokenizer(prompt, return_tensors="pt")
+            started = time.perf_counter()
+            output = model.generate(**inputs, max_new_tokens=new_tokens, do_sample=False,
+                                    pad_token_id=tokenizer.eos_token_id)
+            latencies.append((time.perf_counter() - started) * 1000)
+            outputs.append(output[0, inputs["input_ids"].shape[1]:].tolist())
+    return outputs, statistics.fmean(latencies)
+
+
+def compare_generator(onnx_path, texts, new_tokens):
+    tokenizer = GPT2Tokenizer.from_pretrained("./complaint_model")
+    torch_model = GPT2LMHeadModel.from_pretrained("./complaint_model").eval()
+    onnx_model = load_onnx_causal_lm(onnx_path)
+    prompts = [f"Complaint: {text}\n\nResponse:" for text in texts]
+    torch_outputs, torch_latency = greedy_generations(torch_model, tokenizer, prompts, new_tokens)
+    onnx_outputs, onnx_latency = greedy_generations(onnx_model, tokenizer, prompts, new_tokens)
+    return {
+        "model": "complaint",
+        "samples": len(prompts),
+        "new_tokens": new_tokens,
+        "identical_generations": round(sum(a == b for a, b in zip(torch_outputs, onnx_outputs)) / len(prompts), 4),
+        "torch_generate_latency_ms": round(torch_latency, 1),
+        "onnx_generate_latency_ms": round(onnx_latency, 1),
+        "speedup": round(torch_latency / onnx_latency, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default="synthetic_complaints.csv")
+    parser.add_argument("--onnx-dir", default=DEFAULT_EXPORT_DIR)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--generator-samples", type=int, default=10)
+    parser.add_argument("--new-tokens", type=int, default=50)
+    parser.add_argument("--min-agreement", type=float, default=0.99)
+    parser.add_argument("--max-logit-diff", type=float, default=1e-3)
+    parser.add_argument("--output", default=None, help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    texts = held_out_texts(args.csv, args.samples)
+    tokenizer = DistilBertTokenizer.from_pretrained("distilbert-base-uncased")
+
+    results = []
+    failures = []
+    for name in CLASSIFIERS:
+        onnx_path = os.path.join(args.onnx_dir, f"{name}_model")
+        if not has_onnx_model(onnx_path):
+            print(f"Skipping {name}: no ONNX export in {onnx_path}")
+            continue
+        result = compare_classifier(name, onnx_path, tokenizer, texts, args.batch_size)
+        results.append(result)
+        print(json.dumps(result))
+        if result["agreement"] < args.min_agreement or result["max_abs_logit_diff"] > args.max_logit_diff:
+            failures.append(name)
+
+    onnx_path = os.path.join(args.onnx_dir, "complaint_model")
+    if has_onnx_model(onnx_path):
+        results.append(compare_generator(onnx_path, texts[:args.generator_samples], args.new_tokens))
+        print(json.dumps(results[-1]))
+    else:
+        print(f"Skipping generator: no ONNX export in {onnx_path}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if failures:
+        sys.exit(f"ONNX Runtime outputs diverge from PyTorch for: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
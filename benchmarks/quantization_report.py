@@ -0,0 +1,151 @@
+"""Compare full precision and dynamic int8 models on a held-out complaint slice.
+
+For each DistilBERT classifier it reports accuracy against the labels in
+synthetic_complaints.csv for both variants, how often the two agree, the
+batch latency and the serialized model size. For the GPT-2 response model
+it reports perplexity on complaint/response pairs, generation latency and
+size. The held-out slice uses the same shuffle as train_step2.py.
+
+    python benchmarks/quantization_report.py --csv synthetic_complaints.csv --samples 1000
+"""
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+
+import pandas as pd
+import torch
+from transformers import DistilBertForSequenceClassification, DistilBertTokenizer, GPT2LMHeadModel, GPT2Tokenizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quantization import model_size_mb, quantize_dynamic_int8  # noqa: E402
+
+CLASSIFIERS = ["sentiment", "urgency", "fraud"]
+
+
+def held_out_slice(csv_path, samples, test_size=0.1):
+    """The test split used by train_step2.py, truncated to samples rows"""
+    df = pd.read_csv(csv_path)
+    df_shuffled = df.sample(frac=1, random_state=42)
+    test_df = df_shuffled[:int(len(df) * test_size)]
+    return test_df[:samples]
+
+
+def timed_batches(fn, items, batch_size):
+    latencies = []
+    outputs = []
+    for start in range(0, len(items), batch_size):
+        started = time.perf_counter()
+        outputs.extend(fn(items[start:start + batch_size]))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return outputs, statistics.fmean(latencies)
+
+
+def classify(model, tokenizer, texts):
+    inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
+    with torch.no_grad():
+        return model(**inputs).logits.argmax(-1).tolist()
+
+
+def report_classifier(name, tokenizer, test_df, batch_size):
+    model = DistilBertForSequenceClassification.from_pretrained(f"./{name}_model").eval()
+    quantized = quantize_dynamic_int8(copy.deepcopy(model))
+    texts = test_df["complaint"].tolist()
+    labels = test_df[name].tolist()
+
+    result = {"model": name, "samples": len(texts), "batch_size": batch_size}
+    predictions = {}
+    for variant, variant_model in (("fp32", model), ("int8", quantized)):
+        preds, latency = timed_batches(lambda batch: classify(variant_model, tokenizer, batch), texts, batch_size)
+        predictions[variant] = preds
+        result[variant] = {
+            "accuracy": round(sum(p == l for p, l in zip(preds, labels)) / len(labels), 4),
+            "batch_latency_ms": round(latency, 2),
+            "size_mb": round(model_size_mb(variant_model), 1),
+        }
+    result["accuracy_delta"] = round(result["int8"]["accuracy"] - result["fp32"]["accuracy"], 4)
+    result["agreement"] = round(sum(a == b for a, b in zip(predictions["fp32"], predictions["int8"])) / len(texts), 4)
+    result["speedup"] = round(result["fp32"]["batch_latency_ms"] / result["int8"]["batch_latency_ms"], 2)
+    return result
+
+
+def perplexity(model, tokenizer, texts):
+    losses = []
+    with torch.no_grad():
+        for text in texts:
+            inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
+            losses.append(model(**inputs, labels=inputs["input_ids"]).loss.item())
+    return float(torch.exp(torch.tensor(statistics.fmean(losses))))
+
+
+def generation_latency(model, tokenizer, prompts, new_tokens):
+    latencies = []
+    with torch.no_grad():
+        for prompt in prompts:
+            inputs = tokenizer(prompt, return_tensors="pt")
+            started = time.perf_counter()
+            model.generate(**inputs, max_new_tokens=new_tokens, min_new_tokens=new_tokens, do_sample=False,
+                           pad_token_id=tokenizer.eos_token_id)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.fmean(latencies)
+
+
+def report_generator(path, test_df, samples, new_tokens):
+    tokenizer = GPT2Tokenizer.from_pretrained(path)
+    model = GPT2LMHeadModel.from_pretrained(path).eval()
+    quantized = quantize_dynamic_int8(copy.deepcopy(model))
+    rows = test_df[:samples]
+    texts = [f"Complaint: {c}\n\nResponse: {r}" for c, r in zip(rows["complaint"], rows["response"])]
+    prompts = [f"Complaint: {c}\n\nResponse:" for c in rows["complaint"]]
+
+    result = {"model": path, "samples": len(texts), "new_tokens": new_tokens}
+    for variant, variant_model in (("fp32", model), ("int8", quantized)):
+        result[variant] = {
+            "perplexity": round(perplexity(variant_model, tokenizer, texts), 3),
+            "generate_latency_ms": round(generation_latency(variant_model, tokenizer, prompts, new_tokens), 1),
+            "size_mb": round(model_size_mb(variant_model), 1),
+        }
+    result["perplexity_delta"] = round(result["int8"]["perplexity"] - result["fp32"]["perplexity"], 3)
+    result["speedup"] = round(result["fp32"]["generate_latency_ms"] / result["int8"]["generate_latency_ms"], 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default="synthetic_complaints.csv")
+    parser.add_argument("--samples", type=int, default=1000, help="held-out rows for the classifiers")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--generator", default="./complaint_model", help="GPT-2 model directory")
+    parser.add_argument("--generator-samples", type=int, default=20)
+    parser.add_argument("--new-tokens", type=int, default=50)
+    parser.add_argument("--output", default=None, help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    test_df = held_out_slice(args.csv, args.samples)
+    tokenizer = DistilBertTokenizer.from_pretrained("distilbert-base-uncased")
+
+    results = []
+    for name in CLASSIFIERS:
+        if not os.path.isdir(f"./{name}_model"):
+            print(f"Skipping {name}: ./{name}_model not found")
+            continue
+        results.append(report_classifier(name, tokenizer, test_df, args.batch_size))
+        print(json.dumps(results[-1]))
+    if os.path.isdir(args.generator):
+        results.append(report_generator(args.generator, test_df, args.generator_samples, args.new_tokens))
+        print(json.dumps(results[-1]))
+    else:
+        print(f"Skipping generator: {args.generator} not found")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""End-to-end load test of the FastAPI service, run in-process.
+
+Imports main.py with its storage, user, outbox and shared state files in a
+temporary directory and drives it through httpx's ASGI transport, so no server or
+network is involved. By default the models are small local stand-ins: one
+scikit-learn pipeline per classifier trained on the generated corpus, and a
+response generator that sleeps --generate-ms and returns a corpus response.
+With --models local the real models are loaded from the working directory.
+
+Every scenario runs --requests requests at --concurrency. The complaint texts
+come from preprocess.generate_complaints. For each endpoint the report gives
+throughput and p50/p95/p99 latency. The submit scenario also gives the time
+until /get-response returns the finished complaint. The bulk-submit
+scenario posts --bulk-size NDJSON lines per request and fails any response
+that declares a Content-Length or does not answer every line. The
+notify-greeting scenario submits greetings, which the fast path answers
+without classifying, with notify_email set and fails unless /get-response
+returns them finished. Save runs with --output
+and diff them between versions.
+
+    python benchmarks/service.py --requests 500 --concurrency 32 --output before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from preprocess import generate_complaints  # noqa: E402
+
+SCENARIOS = [
+    "register", "login", "submit-complaint", "get-response", "notify-greeting", "bulk-submit", "complaints", "analytics"
+]
+PASSWORD = "benchmark-password"
+GREETINGS = ["Hello", "hi there", "Good morning!", "hey"]
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return {
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)], 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+    }
+
+
+async def run_load(requests, concurrency, make_request):
+    """Issue make_request(i) for i in range(requests) from concurrency workers and summarize their latencies"""
+    counter = iter(range(requests))
+    latencies = []
+    errors = []
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                await make_request(i)
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    result = {"requests": len(latencies), "requests_per_second": round(len(latencies) / elapsed, 1)}
+    if latencies:
+        result.update(percentiles(latencies))
+    result["errors"] = len(errors)
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+def expect(response, *statuses):
+    if response.status_code not in statuses:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path} returned {response.status_code}")
+    return response
+
+
+def install_stub_models(main, corpus, generate_ms):
+    """Serve small scikit-learn pipelines and a fixed-latency response generator"""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    from inference import clean_text
+
+    texts = [clean_text(row["complaint"]) for row in corpus]
+    for name in ["sentiment", "urgency", "fraud"]:
+        # Identical stateless vectorizers, so the three heads share one transform
+        pipeline = Pipeline([
+            ("vectorizer", HashingVectorizer(n_features=2 ** 18, alternate_sign=False)),
+            ("classifier", LogisticRegression(max_iter=200)),
+        ])
+        pipeline.fit(texts, [row[name] for row in corpus])
+        main.models.register(name, lambda pipeline=pipeline: (pipeline, True))
+
+    responses = [row["response"] for row in corpus]
+
+    def generate_response(complaint_id, category, complaint, sentiment=None, urgency=None, fraud=None, on_text=None):
+        time.sleep(generate_ms / 1000)
+        response = f"{random.choice(responses)} (ID: {complaint_id})"
+        if on_text:
+            on_text(response)
+        return response
+
+    main.generate_response = generate_response
+    main.models.load_all()
+
+
+def preload_complaints(main, corpus, count):
+    """Store count finished complaints so /complaints and /analytics run against some history"""
+    from inference import FRAUD_LABELS, SENTIMENT_LABELS, URGENCY_LABELS
+
+    now = time.time()
+    records = []
+    for i in range(count):
+        row = corpus[i % len(corpus)]
+        records.append({
+            "complaint_id": f"BENCH{i:08d}",
+            "category": row["category"],
+            "complaint": row["complaint"],
+            "sentiment": SENTIMENT_LABELS[row["sentiment"]],
+            "sentiment_confidence": 0.9,
+            "urgency": URGENCY_LABELS[row["urgency"]],
+            "urgency_confidence": 0.9,
+            "fraud": FRAUD_LABELS[row["fraud"]],
+            "fraud_confidence": 0.9,
+            "response": row["response"],
+            "timestamp": now - count + i,
+        })
+    for start in range(0, len(records), 10000):
+        batch = records[start:start + 10000]
+        main.complaint_storage.append_many(batch)
+
+
+async def wait_for_response(client, complaint_id, poll_seconds):
+    while True:
+        response = expect(await client.get(f"/get-response/{complaint_id}"), 200, 202)
+        if response.status_code == 200:
+            return response
+        await asyncio.sleep(poll_seconds)
+
+
+async def run_scenarios(main, corpus, args):
+    transport = httpx.ASGITransport(app=main.app)
+    results = {}
+    # The ASGI transport does not send lifespan events, so run the hooks directly
+    await main.startup()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            async def register(i):
+                expect(await client.post("/register", json={
+                    "username": f"user{i}", "email": f"user{i}@example.com", "password": PASSWORD
+                }), 200)
+
+            async def login(i):
+                body = expect(await client.post("/login", json={
+                    "email": f"user{i % args.requests}@example.com", "password": PASSWORD
+                }), 200).json()
+                if body.get("status") != "success":
+                    raise RuntimeError(f"login failed: {body}")
+
+            submitted = []
+            completion_ms = []
+
+            async def submit(i):
+                row = corpus[i % len(corpus)]
+                started = time.perf_counter()
+                body = expect(await client.post("/submit-complaint", json={
+                    "text": row["complaint"], "category": row["category"]
+                }), 200).json()
+                submitted.append((body["complaint_id"], started))
+
+            async def get_response(i):
+                complaint_id, started = submitted[i % len(submitted)]
+                await wait_for_response(client, complaint_id, args.poll_ms / 1000)
+                if i < len(submitted):
+                    completion_ms.append((time.perf_counter() - started) * 1000)
+
+            async def notify_greeting(i):
+                body = expect(await client.post("/submit-complaint", json={
+                    "text": GREETINGS[i % len(GREETINGS)], "category": "General", "notify_email": f"user{i}@example.com"
+                }), 200).json()
+                # A notification that cannot be rendered would turn this into a 500
+                await wait_for_response(client, body["complaint_id"], args.poll_ms / 1000)
+
+            async def bulk_submit(i):
+                rows = [corpus[(i * args.bulk_size + n) % len(corpus)] for n in range(args.bulk_size)]
+                body = "".join(json.dumps({"text": row["complaint"], "category": row["category"]}) + "\n" for row in rows)
+                response = expect(await client.post(
+                    "/submit-complaints/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}
+                ), 200)
+                # A declared length would make real servers reject the streamed body
+                if "content-length" in response.headers:
+                    raise RuntimeError(f"bulk response declares content-length {response.headers['content-length']}")
+                results = [json.loads(line) for line in response.text.splitlines()]
+                if [result["line"] for result in results] != list(range(1, len(rows) + 1)):
+                    raise RuntimeError(f"expected {len(rows)} results in order, got {len(results)}")
+                failed = [result for result in results if result["status"] != "done"]
+                if failed:
+                    raise RuntimeError(f"bulk line failed: {failed[0]}")
+
+            async def complaints(i):
+                response = expect(await client.get("/complaints", params={"limit": args.page_size, "order": "desc"}), 200)
+                if not response.content:
+                    raise RuntimeError("empty /complaints page")
+
+            async def analytics(i):
+                expect(await client.get("/analytics"), 200)
+
+            handlers = {
+                "register": register,
+                "login": login,
+                "submit-complaint": submit,
+                "get-response": get_response,
+                "notify-greeting": notify_greeting,
+                "bulk-submit": bulk_submit,
+                "complaints": complaints,
+                "analytics": analytics,
+            }
+            for scenario in args.scenarios:
+                results[scenario] = await run_load(args.requests, args.concurrency, handlers[scenario])
+                if scenario == "get-response" and completion_ms:
+                    # Submission until the finished complaint is returned
+                    results["complaint-completion"] = {"requests": len(completion_ms), **percentiles(completion_ms)}
+                print(json.dumps({scenario: results[scenario]}))
+            stats = (await client.get("/stats")).json()
+    finally:
+        await main.shutdown()
+    return results, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS,
+                        help="scenarios to run, in order; get-response needs submit-complaint and login needs register")
+    parser.add_argument("--models", default="stub", choices=["stub", "local"])
+    parser.add_argument("--corpus-size", type=int, default=5000, help="rows generated with preprocess.py")
+    parser.add_argument("--preload", type=int, default=10000, help="complaints stored before the run")
+    parser.add_argument("--generate-ms", type=float, default=50, help="latency of the stub response generator")
+    parser.add_argument("--bulk-size", type=int, default=100, help="complaints per bulk-submit request")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--poll-ms", type=float, default=20)
+    parser.add_argument("--hash-iterations", type=int, default=int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000")))
+    parser.add_argument("--storage", default="jsonl", choices=["jsonl", "sqlite"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--output", default=None, help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    corpus = generate_complaints(args.corpus_size)
+    workdir = tempfile.mkdtemp(dir=args.workdir)
+    os.environ.update({
+        "COMPLAINT_STORAGE": args.storage,
+        "COMPLAINT_STORAGE_PATH": os.path.join(workdir, f"complaints.{args.storage}"),
+        "USER_STORE_PATH": os.path.join(workdir, "users.db"),
+        "EMAIL_OUTBOX_PATH": os.path.join(workdir, "outbox.db"),
+        "SHARED_STATE_PATH": os.path.join(workdir, "shared_state.db"),
+        "PROFILE_DIR": os.path.join(workdir, "profiles"),
+        # Never present, so the real data/*.json files are not migrated into the scratch stores
+        "LEGACY_COMPLAINTS_FILE": os.path.join(workdir, "complaints.json"),
+        "LEGACY_USERS_FILE": os.path.join(workdir, "users.json"),
+        "EMAIL_DELIVERY": "log",
+        "PASSWORD_HASH_ITERATIONS": str(args.hash_iterations),
+        "MODEL_LOADING": "eager" if args.models == "local" else "lazy",
+    })
+    # Local runs stay in the working directory the model folders are loaded from
+    previous_cwd = os.getcwd()
+    if args.models == "stub":
+        os.chdir(workdir)
+    try:
+        import main as service
+
+        if args.models == "stub":
+            install_stub_models(service, corpus, args.generate_ms)
+        preload_complaints(service, corpus, args.preload)
+        endpoints, stats = asyncio.run(run_scenarios(service, corpus, args))
+        results = {
+            "config": {key: value for key, value in vars(args).items() if key not in ("workdir", "output")},
+            "endpoints": endpoints,
+            "stats": stats,
+        }
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import json
+
+from starlette.responses import Response
+
+
+class BulkNDJSONResponse(Response):
+    """Read an NDJSON request body in batches and stream one result line per item.
+
+    The response reads the request body itself instead of letting the
+    framework buffer it. Lines are collected until batch_size items are
+    pending, then process_batch(items) is awaited with a list of
+    (line_number, raw_line) pairs and must return one JSON-serializable
+    result per item. The results are sent before more of the body is read.
+    Only one batch is ever held in memory, and a client that stops reading
+    results stops the upload as well. Clients should therefore read the
+    response while they are still sending.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def __init__(self, process_batch, batch_size=32, max_line_bytes=1024 * 1024):
+        # Like StreamingResponse there is no body attribute, so no content-length
+        # header is added and the server sends the results chunked
+        self.status_code = 200
+        self.background = None
+        self.init_headers()
+        self.process_batch = process_batch
+        self.batch_size = batch_size
+        self.max_line_bytes = max_line_bytes
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        # Bytes of the line still being received; only newly received bytes are scanned
+        partial = bytearray()
+        batch = []
+        line_number = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            lines = []
+            start = 0
+            end = body.find(b"\n")
+            while end >= 0:
+                if partial:
+                    partial += body[start:end]
+                    lines.append(bytes(partial))
+                    partial.clear()
+                else:
+                    lines.append(body[start:end])
+                start = end + 1
+                end = body.find(b"\n", start)
+            partial += body[start:]
+            if not more_body:
+                # The last line does not need a trailing newline
+                lines.append(bytes(partial))
+                partial.clear()
+            for line in lines:
+                line_number += 1
+                if not line.strip():
+                    continue
+                batch.append((line_number, line))
+                if len(batch) >= self.batch_size:
+                    await self._send_lines(send, await self.process_batch(batch))
+                    batch = []
+            if len(partial) > self.max_line_bytes:
+                if batch:
+                    await self._send_lines(send, await self.process_batch(batch))
+                await self._send_lines(send, [{
+                    "line": line_number + 1,
+                    "status": "error",
+                    "error": f"Line is longer than {self.max_line_bytes} bytes, aborting",
+                }])
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+        if batch:
+            await self._send_lines(send, await self.process_batch(batch))
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_lines(self, send, results):
+        body = b"".join(json.dumps(result).encode("utf-8") + b"\n" for result in results)
+        # send waits while the client's receive window is full, which pauses reading the upload
+        await send({"type": "http.response.body", "body": body, "more_body": True})
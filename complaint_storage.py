@@ -0,0 +1,403 @@
+import json
+import os
+import sqlite3
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+
+class ComplaintStorage:
+    """Interface for complaint persistence backends.
+
+    Backends only ever append records; existing records are never rewritten,
+    so the cost of saving a complaint does not depend on how many are stored.
+    """
+
+    def append(self, record):
+        raise NotImplementedError
+
+    def append_many(self, records):
+        """Append several records as one grouped write"""
+        for record in records:
+            self.append(record)
+
+    def iter_all(self):
+        """Yield every stored complaint in insertion order"""
+        raise NotImplementedError
+
+    def scan(self, position=None, reverse=False):
+        """Yield (position, record) pairs starting after an opaque position.
+
+        The position yielded with a record resumes the scan right after that
+        record, which is what cursor-based pagination hands back to clients.
+        """
+        records = list(self.iter_all())
+        if reverse:
+            end = len(records) if position is None else position
+            for index in range(end - 1, -1, -1):
+                yield index, records[index]
+        else:
+            for index in range(position or 0, len(records)):
+                yield index + 1, records[index]
+
+    def get(self, complaint_id):
+        """Return the stored complaint with this ID, or None"""
+        for record in self.iter_all():
+            if record.get("complaint_id") == complaint_id:
+                return record
+        return None
+
+    def count(self):
+        return sum(1 for _ in self.iter_all())
+
+    def close(self):
+        pass
+
+
+class JsonlComplaintStorage(ComplaintStorage):
+    """Append-only JSON Lines log, one complaint per line.
+
+    Each append is a single write to a file opened in append mode, guarded by
+    a thread lock and an advisory file lock so several processes can share
+    the log. With fsync enabled the record is on disk before append returns.
+
+    A sidecar SQLite file maps complaint_id to the byte offset of its line,
+    so lookups never scan the log. The index remembers how far into the log
+    it has indexed and catches up with lines appended by other processes.
+    """
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Make sure the file exists so readers never race its creation
+        open(path, "ab").close()
+        self._repair_tail()
+        self._index = sqlite3.connect(path + ".idx", check_same_thread=False, isolation_level=None, timeout=30)
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute("PRAGMA synchronous=NORMAL")
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS offsets (complaint_id TEXT PRIMARY KEY, offset INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._index.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        with self._lock:
+            self._catch_up_index()
+
+    def _repair_tail(self):
+        """Cut off a torn final line left by a crash so later appends start on a fresh line"""
+        with open(self.path, "rb+") as f:
+            # A line another process is still appending looks torn; its append holds this lock
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self._truncate_torn_line(f)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _truncate_torn_line(self, f):
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Walk back to the last complete line
+        position = size
+        while position > 0:
+            step = min(65536, position)
+            position -= step
+            f.seek(position)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                f.truncate(position + newline + 1)
+                return
+        f.truncate(0)
+
+    def _encode(self, record):
+        return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+    def append(self, record):
+        self.append_many([record])
+
+    def append_many(self, records):
+        data = b"".join(self._encode(record) for record in records)
+        if not data:
+            return
+        with self._lock, open(self.path, "ab") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                start = f.seek(0, os.SEEK_END)
+                f.write(data)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            # Bring the index up to date, including lines other processes appended before ours
+            self._catch_up_index(known_end=start)
+            entries = []
+            offset = start
+            for record in records:
+                entries.append((record["complaint_id"], offset))
+                offset += len(self._encode(record))
+            self._write_index(entries, offset)
+
+    def _indexed_until(self):
+        row = self._index.execute("SELECT value FROM meta WHERE key = 'indexed_until'").fetchone()
+        return row[0] if row else 0
+
+    def _write_index(self, entries, indexed_until):
+        self._index.execute("BEGIN IMMEDIATE")
+        try:
+            self._index.executemany("INSERT OR REPLACE INTO offsets (complaint_id, offset) VALUES (?, ?)", entries)
+            self._index.execute(
+                "INSERT INTO meta (key, value) VALUES ('indexed_until', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+                (indexed_until,)
+            )
+            self._index.execute("COMMIT")
+        except Exception:
+            self._index.execute("ROLLBACK")
+            raise
+
+    def _catch_up_index(self, known_end=None, batch_size=10000):
+        """Index log lines past the watermark, stopping at known_end if given; caller holds the lock"""
+        position = self._indexed_until()
+        if known_end is not None and position >= known_end:
+            return
+        entries = []
+        with open(self.path, "rb") as f:
+            f.seek(position)
+            while known_end is None or position < known_end:
+                line = f.readline()
+                record = self._decode(line)
+                if record is None and not line.endswith(b"\n"):
+                    break
+                if record is not None and "complaint_id" in record:
+                    entries.append((record["complaint_id"], position))
+                position += len(line)
+                if len(entries) >= batch_size:
+                    self._write_index(entries, position)
+                    entries = []
+        self._write_index(entries, position)
+
+    def iter_all(self):
+        with open(self.path, "rb") as f:
+            for line in f:
+                record = self._decode(line)
+                if record is not None:
+                    yield record
+
+    def scan(self, position=None, reverse=False):
+        # Positions are byte offsets: the end of the line going forward, its start going backward
+        if reverse:
+            yield from self._scan_reverse(position)
+            return
+        with open(self.path, "rb") as f:
+            offset = f.seek(position or 0)
+            for line in f:
+                offset += len(line)
+                record = self._decode(line)
+                if record is not None:
+                    yield offset, record
+
+    def _scan_reverse(self, position, block_size=65536):
+        with open(self.path, "rb") as f:
+            read_from = f.seek(0, os.SEEK_END) if position is None else position
+            buffer = b""
+            while True:
+                # Newline ending the line before the last one in the buffer
+                newline = buffer.rfind(b"\n", 0, max(0, len(buffer) - 1))
+                if newline == -1 and read_from > 0:
+                    step = min(block_size, read_from)
+                    read_from -= step
+                    f.seek(read_from)
+                    buffer = f.read(step) + buffer
+                    continue
+                line = buffer[newline + 1:]
+                buffer = buffer[:newline + 1]
+                record = self._decode(line)
+                if record is not None:
+                    yield read_from + newline + 1, record
+                if not buffer:
+                    return
+
+    def get(self, complaint_id):
+        with self._lock:
+            row = self._index.execute("SELECT offset FROM offsets WHERE complaint_id = ?", (complaint_id,)).fetchone()
+            if row is None:
+                # Another process may have appended it since we last looked
+                self._catch_up_index()
+                row = self._index.execute("SELECT offset FROM offsets WHERE complaint_id = ?", (complaint_id,)).fetchone()
+        if row is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(row[0])
+            return self._decode(f.readline())
+
+    def count(self):
+        with self._lock:
+            self._catch_up_index()
+            return self._index.execute("SELECT COUNT(*) FROM offsets").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._index.close()
+
+    def _decode(self, line):
+        if not line.endswith(b"\n"):
+            # A torn final line from an interrupted write is ignored
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+
+class SqliteComplaintStorage(ComplaintStorage):
+    """SQLite table in WAL mode; every append is its own durable transaction"""
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS complaints ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "complaint_id TEXT NOT NULL, "
+            "timestamp REAL, "
+            "data TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS complaints_by_id ON complaints (complaint_id)")
+
+    def append(self, record):
+        self.append_many([record])
+
+    def append_many(self, records):
+        rows = [
+            (record["complaint_id"], record.get("timestamp"), json.dumps(record, separators=(",", ":")))
+            for record in records
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO complaints (complaint_id, timestamp, data) VALUES (?, ?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def iter_all(self, chunk_size=1000):
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, data FROM complaints WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (last_seq, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            for seq, data in rows:
+                yield json.loads(data)
+            last_seq = rows[-1][0]
+
+    def scan(self, position=None, reverse=False, chunk_size=1000):
+        # Positions are sequence numbers
+        while True:
+            with self._lock:
+                if reverse:
+                    rows = self._conn.execute(
+                        "SELECT seq, data FROM complaints WHERE seq < ? ORDER BY seq DESC LIMIT ?",
+                        (position if position is not None else 2 ** 63 - 1, chunk_size)
+                    ).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        "SELECT seq, data FROM complaints WHERE seq > ? ORDER BY seq LIMIT ?",
+                        (position or 0, chunk_size)
+                    ).fetchall()
+            if not rows:
+                return
+            for seq, data in rows:
+                yield seq, json.loads(data)
+            position = rows[-1][0]
+
+    def get(self, complaint_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM complaints WHERE complaint_id = ? ORDER BY seq DESC LIMIT 1", (complaint_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM complaints").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+STORAGE_BACKENDS = {
+    "jsonl": JsonlComplaintStorage,
+    "sqlite": SqliteComplaintStorage,
+}
+
+DEFAULT_PATHS = {
+    "jsonl": "data/complaints.jsonl",
+    "sqlite": "data/complaints.db",
+}
+
+
+def open_storage(backend="jsonl", path=None, fsync=True):
+    """Create the storage backend selected by name"""
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown complaint storage backend '{backend}', expected one of {sorted(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[backend](path or DEFAULT_PATHS[backend], fsync=fsync)
+
+
+def migrate_legacy_json(json_path, storage):
+    """Migrate a legacy complaints.json into storage unless it already holds complaints; returns the count.
+
+    Every worker process runs this at startup. An exclusive lock on a file
+    beside the store makes the emptiness check and the copy a single step,
+    so only the first process migrates. The copy is one grouped write, so an
+    interrupted migration leaves the store empty and is retried on the next
+    start.
+    """
+    with open(storage.path + ".migrate.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if storage.count():
+                return 0
+            with open(json_path, "r") as f:
+                complaints = json.load(f).get("complaints", [])
+            storage.append_many(complaints)
+            return len(complaints)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def migrate_json_file(json_path, storage, batch_size=1000):
+    """Copy the complaints from a legacy complaints.json document into storage; returns the count"""
+    with open(json_path, "r") as f:
+        complaints = json.load(f).get("complaints", [])
+    for start in range(0, len(complaints), batch_size):
+        storage.append_many(complaints[start:start + batch_size])
+    return len(complaints)
@@ -1,116 +1,373 @@
-
+import html
+import os
+import queue
+import random
 import smtplib
+import sqlite3
+import string
+import threading
+import time
+import uuid
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 
-def send_complaint_notification(to_email, complaint_data):
-    """
-    Send an email notification with complaint details and response
-    
-    Args:
-        to_email: Recipient email address
-        complaint_data: Dictionary containing complaint details
-    """
-    # For demonstration purposes - in a production environment you would use real SMTP credentials
-    sender_email = "notifications@ai-grievance.com"
-    smtp_server = "smtp.your-email-provider.com"
-    smtp_port = 587
-    smtp_username = "your-username"
-    smtp_password = "your-password"
-    
-    subject = f"Your Complaint {complaint_data['complaint_id']} Has Been Processed"
-    
-    # Create HTML email content with formatting
-    html_content = f"""
+# Templates are compiled once at import; rendering only substitutes values
+SUBJECT_TEMPLATE = string.Template("Your Complaint $complaint_id Has Been Processed")
+
+HTML_TEMPLATE = string.Template("""
     <html>
     <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto;">
         <div style="background-color: #f7f9fc; padding: 20px; border-radius: 5px; border-left: 4px solid #2DD4BF;">
             <h2 style="color: #1E2A44;">AI Grievance System: Complaint Processed</h2>
             <p>Your complaint has been analyzed and processed by our AI system.</p>
-            
+
             <div style="background-color: white; padding: 15px; border-radius: 4px; margin: 15px 0; border: 1px solid #eee;">
-                <p><strong>Complaint ID:</strong> {complaint_data['complaint_id']}</p>
-                <p><strong>Category:</strong> {complaint_data['category']}</p>
-                <p><strong>Submitted:</strong> {datetime.fromtimestamp(complaint_data['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}</p>
-                <p><strong>Your complaint:</strong> {complaint_data['complaint']}</p>
+                <p><strong>Complaint ID:</strong> $complaint_id</p>
+                <p><strong>Category:</strong> $category</p>
+                <p><strong>Submitted:</strong> $submitted</p>
+                <p><strong>Your complaint:</strong> $complaint</p>
             </div>
-            
+
             <div style="background-color: #f0fffc; padding: 15px; border-radius: 4px; margin: 15px 0; border: 1px solid #d0ebe8;">
                 <h3 style="color: #2DD4BF; margin-top: 0;">Our Response:</h3>
-                <p>{complaint_data['response']}</p>
+                <p>$response</p>
             </div>
-            
+
             <div style="background-color: #f7f9fc; padding: 15px; border-radius: 4px; margin: 15px 0; border: 1px solid #eee;">
                 <h3 style="margin-top: 0;">AI Analysis:</h3>
-                <p><strong>Sentiment:</strong> {complaint_data['sentiment']}</p>
-                <p><strong>Urgency:</strong> {complaint_data['urgency']}</p>
-                <p><strong>Fraud Assessment:</strong> {complaint_data['fraud']}</p>
-                
+                <p><strong>Sentiment:</strong> $sentiment</p>
+                <p><strong>Urgency:</strong> $urgency</p>
+                <p><strong>Fraud Assessment:</strong> $fraud</p>
+
                 <div style="margin-top: 15px; background-color: #eef2f7; padding: 10px; border-radius: 4px;">
                     <p style="margin: 5px 0;"><strong>AI Confidence:</strong></p>
-                    <p style="margin: 5px 0;">Sentiment: {int(complaint_data.get('sentiment_confidence', 0.9) * 100)}%</p>
-                    <p style="margin: 5px 0;">Urgency: {int(complaint_data.get('urgency_confidence', 0.9) * 100)}%</p>
-                    <p style="margin: 5px 0;">Fraud: {int(complaint_data.get('fraud_confidence', 0.9) * 100)}%</p>
+                    <p style="margin: 5px 0;">Sentiment: $sentiment_confidence</p>
+                    <p style="margin: 5px 0;">Urgency: $urgency_confidence</p>
+                    <p style="margin: 5px 0;">Fraud: $fraud_confidence</p>
                 </div>
             </div>
-            
+
             <p>Thank you for using our AI Grievance System.</p>
             <p style="font-size: 12px; color: #666;">This is an automated message. Please do not reply directly to this email.</p>
         </div>
     </body>
     </html>
-    """
-    
-    # Create plain text version as fallback
-    text_content = f"""
+    """)
+
+TEXT_TEMPLATE = string.Template("""
     AI Grievance System: Complaint Processed
-    
+
     Your complaint has been analyzed and processed by our AI system.
-    
-    Complaint ID: {complaint_data['complaint_id']}
-    Category: {complaint_data['category']}
-    Submitted: {datetime.fromtimestamp(complaint_data['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}
-    Your complaint: {complaint_data['complaint']}
-    
+
+    Complaint ID: $complaint_id
+    Category: $category
+    Submitted: $submitted
+    Your complaint: $complaint
+
     Our Response:
-    {complaint_data['response']}
-    
+    $response
+
     AI Analysis:
-    Sentiment: {complaint_data['sentiment']}
-    Urgency: {complaint_data['urgency']}
-    Fraud Assessment: {complaint_data['fraud']}
-    
+    Sentiment: $sentiment
+    Urgency: $urgency
+    Fraud Assessment: $fraud
+
     Thank you for using our AI Grievance System.
+    """)
+
+
+# Shown for labels and confidences of complaints the fast path answered without classifying
+NOT_CLASSIFIED = "n/a"
+
+
+def _label(value):
+    return NOT_CLASSIFIED if value is None else value
+
+
+def _percent(confidence):
+    return NOT_CLASSIFIED if confidence is None else f"{int(confidence * 100)}%"
+
+
+def render_complaint_email(complaint_data):
+    """Render the notification for a processed complaint; returns (subject, text_body, html_body)"""
+    values = {
+        "complaint_id": complaint_data["complaint_id"],
+        "category": complaint_data["category"],
+        "submitted": datetime.fromtimestamp(complaint_data["timestamp"]).strftime("%Y-%m-%d %H:%M:%S"),
+        "complaint": complaint_data["complaint"],
+        "response": complaint_data["response"],
+        "sentiment": _label(complaint_data["sentiment"]),
+        "urgency": _label(complaint_data["urgency"]),
+        "fraud": _label(complaint_data["fraud"]),
+        "sentiment_confidence": _percent(complaint_data.get("sentiment_confidence", 0.9)),
+        "urgency_confidence": _percent(complaint_data.get("urgency_confidence", 0.9)),
+        "fraud_confidence": _percent(complaint_data.get("fraud_confidence", 0.9)),
+    }
+    escaped = {key: html.escape(str(value)) for key, value in values.items()}
+    return SUBJECT_TEMPLATE.substitute(values), TEXT_TEMPLATE.substitute(values), HTML_TEMPLATE.substitute(escaped)
+
+
+class SMTPConnectionPool:
+    """Keeps up to max_size logged-in SMTP connections for reuse.
+
+    Connections are checked with NOOP before being handed out again, so
+    STARTTLS and login only happen when a connection is new or has dropped.
     """
-    
-    # For demonstration purposes, just print to console instead of sending
-    print(f"Would send email to {to_email} with subject: {subject}")
-    print("Email content would include the complaint details and AI response")
-    
-    # In a production environment, uncomment the following to actually send emails:
-    """
-    try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = sender_email
-        msg['To'] = to_email
-        
-        part1 = MIMEText(text_content, 'plain')
-        part2 = MIMEText(html_content, 'html')
-        
-        msg.attach(part1)
-        msg.attach(part2)
-        
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.ehlo()
+
+    def __init__(self, host, port=587, username=None, password=None, starttls=True, timeout=30, max_size=2):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        self.connections_opened = 0
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        server.ehlo()
+        if self.starttls:
             server.starttls()
-            server.login(smtp_username, smtp_password)
-            server.send_message(msg)
-            
-        return True
-    except Exception as e:
-        print(f"Failed to send email: {e}")
-        return False
+            server.ehlo()
+        if self.username:
+            server.login(self.username, self.password)
+        self.connections_opened += 1
+        return server
+
+    def acquire(self):
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except smtplib.SMTPException:
+                pass
+            self.discard(server)
+
+    def release(self, server):
+        try:
+            self._idle.put_nowait(server)
+        except queue.Full:
+            self.discard(server)
+
+    def discard(self, server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self.discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class EmailOutbox:
+    """Persistent queue of outgoing emails delivered by background sender threads.
+
+    Messages are stored in SQLite when they are enqueued, so a restart does
+    not lose notifications. Each sender claims up to batch_size due messages
+    and sends them over one pooled SMTP connection. Failed messages are
+    retried with exponential backoff until max_attempts is reached.
+    Without a connection pool the outbox only logs what it would send.
+
+    Several processes may share the outbox file. Each claim records its
+    owner and time. A claim still unfinished after claim_timeout_seconds
+    is treated as abandoned by a dead sender and claimed again.
     """
-    return True
+
+    def __init__(self, path, sender_email, pool=None, senders=2, batch_size=50,
+                 max_attempts=5, retry_base_seconds=5, poll_seconds=1, claim_timeout_seconds=600):
+        self.path = path
+        self.sender_email = sender_email
+        self.pool = pool
+        self.senders = senders
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_seconds = poll_seconds
+        self.claim_timeout_seconds = claim_timeout_seconds
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self.sent = 0
+        self.failed = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "recipient TEXT NOT NULL, "
+            "subject TEXT NOT NULL, "
+            "text_body TEXT NOT NULL, "
+            "html_body TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL, "
+            "last_error TEXT, "
+            "created_at REAL NOT NULL, "
+            "claimed_by TEXT, "
+            "claimed_at REAL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")]
+        for column, kind in (("claimed_by", "TEXT"), ("claimed_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+
+    def enqueue(self, to_email, complaint_data):
+        """Render and store a complaint notification for delivery"""
+        subject, text_body, html_body = render_complaint_email(complaint_data)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO outbox (recipient, subject, text_body, html_body, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (to_email, subject, text_body, html_body, now, now)
+            )
+        self._wake.set()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.senders):
+            thread = threading.Thread(target=self._run, name=f"email-outbox-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self.pool is not None:
+            self.pool.close()
+
+    def _claim(self):
+        """Claim due messages, and messages whose claim has gone stale, for this sender"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, recipient, subject, text_body, html_body, attempts FROM outbox "
+                    "WHERE (status = 'pending' AND next_attempt_at <= ?) "
+                    "OR (status = 'sending' AND COALESCE(claimed_at, 0) < ?) "
+                    "ORDER BY next_attempt_at LIMIT ?",
+                    (now, now - self.claim_timeout_seconds, self.batch_size)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE outbox SET status = 'sending', claimed_by = ?, claimed_at = ? WHERE id = ?",
+                    [(self.owner, now, row[0]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _run(self):
+        errors = 0
+        while not self._stop.is_set():
+            try:
+                batch = self._claim()
+                if not batch:
+                    self._wake.wait(self.poll_seconds)
+                    self._wake.clear()
+                    continue
+                self._send_batch(batch)
+                errors = 0
+            except Exception as e:
+                # Keep the sender alive; messages it had claimed are reclaimed once their claim goes stale
+                errors += 1
+                delay = min(60, self.poll_seconds * 2 ** (errors - 1))
+                print(f"Email sender {threading.current_thread().name} failed, retrying in {delay:.1f}s: {e}")
+                self._stop.wait(delay)
+
+    def _build_message(self, recipient, subject, text_body, html_body):
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"] = self.sender_email
+        msg["To"] = recipient
+        msg.attach(MIMEText(text_body, "plain"))
+        msg.attach(MIMEText(html_body, "html"))
+        return msg
+
+    def _send_batch(self, batch):
+        if self.pool is None:
+            for message_id, recipient, subject, _, _, _ in batch:
+                print(f"Would send email to {recipient} with subject '{subject}'")
+                self._mark_sent(message_id)
+            return
+
+        try:
+            server = self.pool.acquire()
+        except (smtplib.SMTPException, OSError) as e:
+            for message_id, _, _, _, _, attempts in batch:
+                self._mark_failed(message_id, attempts + 1, e)
+            return
+
+        for message_id, recipient, subject, text_body, html_body, attempts in batch:
+            if server is None:
+                # The connection dropped mid-batch; the rest goes back in the queue
+                self._mark_failed(message_id, attempts + 1, "SMTP connection lost")
+                continue
+            try:
+                server.send_message(self._build_message(recipient, subject, text_body, html_body))
+            except Exception as e:
+                # Recipient-level refusals leave the connection usable; anything else drops it
+                if not isinstance(e, (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError)):
+                    self.pool.discard(server)
+                    server = None
+                self._mark_failed(message_id, attempts + 1, e)
+            else:
+                self._mark_sent(message_id)
+        if server is not None:
+            self.pool.release(server)
+
+    def _mark_sent(self, message_id):
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET status = 'sent', attempts = attempts + 1 WHERE id = ?", (message_id,))
+            self.sent += 1
+
+    def _mark_failed(self, message_id, attempts, error):
+        print(f"Failed to send email {message_id} (attempt {attempts}): {error}")
+        with self._lock:
+            if attempts >= self.max_attempts:
+                status, next_attempt_at = "failed", time.time()
+                self.failed += 1
+            else:
+                # Exponential backoff with jitter so a recovering server is not hit all at once
+                delay = self.retry_base_seconds * 2 ** (attempts - 1)
+                status, next_attempt_at = "pending", time.time() + delay * random.uniform(0.8, 1.2)
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (status, attempts, next_attempt_at, str(error), message_id)
+            )
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        return {
+            "pending": counts.get("pending", 0) + counts.get("sending", 0),
+            "sent": counts.get("sent", 0),
+            "failed": counts.get("failed", 0),
+            "smtp_connections_opened": self.pool.connections_opened if self.pool is not None else 0,
+        }
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._conn.close()
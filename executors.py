@@ -0,0 +1,89 @@
+import asyncio
+import contextvars
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """Bounded thread pool that tracks queue depth and queue wait times.
+
+    Work submitted from the event loop runs with a copy of the caller's
+    context variables, so request-scoped state is visible in the worker thread.
+    """
+
+    def __init__(self, name, max_workers, history_size=1000):
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._max_queued = 0
+        self._waits = deque(maxlen=history_size)
+        self._runtimes = deque(maxlen=history_size)
+
+    def submit(self, fn, /, *args, **kwargs):
+        submitted = time.perf_counter()
+        context = contextvars.copy_context()
+
+        def timed():
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._waits.append(started - submitted)
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    self._runtimes.append(finished - started)
+
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+        try:
+            return super().submit(timed)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking function in the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self, lambda: fn(*args, **kwargs))
+
+    def stats(self):
+        """Return queue depth, utilisation and wait/run time figures in milliseconds"""
+        with self._lock:
+            waits = [w * 1000 for w in self._waits]
+            runtimes = [r * 1000 for r in self._runtimes]
+            stats = {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "max_queue_depth": self._max_queued,
+                "active": self._active,
+                "completed": self._completed,
+            }
+        stats["wait_ms"] = _summarize(waits)
+        stats["run_ms"] = _summarize(runtimes)
+        return stats
+
+
+def _summarize(values):
+    if not values:
+        return {"avg": 0, "p50": 0, "p95": 0, "max": 0}
+    ordered = sorted(values)
+    return {
+        "avg": round(statistics.fmean(ordered), 3),
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
@@ -0,0 +1,36 @@
+import argparse
+import os
+
+from transformers import DistilBertTokenizer, GPT2Tokenizer
+
+from onnx_backend import DEFAULT_EXPORT_DIR, export_causal_lm, export_classifier, onnx_runtime_available
+
+CLASSIFIERS = ["sentiment", "urgency", "fraud"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the DistilBERT classifiers and the GPT-2 response model to ONNX")
+    parser.add_argument("--output", default=DEFAULT_EXPORT_DIR, help="directory to write the exported models to")
+    parser.add_argument("--models", nargs="+", default=CLASSIFIERS + ["complaint"],
+                        choices=CLASSIFIERS + ["complaint"], help="models to export")
+    args = parser.parse_args()
+
+    if not onnx_runtime_available():
+        parser.error("ONNX export needs optimum with onnxruntime: pip install 'optimum[onnxruntime]'")
+
+    bert_tokenizer = DistilBertTokenizer.from_pretrained("distilbert-base-uncased")
+    for name in args.models:
+        source = f"./{name}_model"
+        target = os.path.join(args.output, f"{name}_model")
+        if not os.path.isdir(source):
+            print(f"Skipping {name}: {source} not found")
+            continue
+        if name == "complaint":
+            export_causal_lm(source, target, GPT2Tokenizer.from_pretrained(source))
+        else:
+            export_classifier(source, target, bert_tokenizer)
+        print(f"Exported {source} to {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import os
+import threading
+
+import joblib
+import torch
+from sklearn.pipeline import Pipeline
+from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
+
+from metrics import Histogram
+from model_registry import ModelRegistry
+from onnx_backend import has_onnx_model, load_onnx_classifier, onnx_runtime_available
+from quantization import quantize_dynamic_int8
+
+# Model loading and classification, shared by the API in main.py and offline
+# tools such as score_corpus.py. Importing this module opens no service state.
+
+# main.py registers this with the metrics it serves on /metrics
+stage_seconds = Histogram(
+    "complaint_stage_seconds",
+    "Time spent in each stage of complaint processing; classifier stages are timed per batch",
+    ["stage"]
+)
+
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+print(f"Using device: {device}")
+
+# Opt-in dynamic int8 quantization of the linear layers for CPU serving ("none" or "int8")
+MODEL_QUANTIZATION = os.getenv("MODEL_QUANTIZATION", "none")
+if MODEL_QUANTIZATION == "int8" and device.type != "cpu":
+    print("int8 dynamic quantization is only supported on CPU, serving full precision models")
+    MODEL_QUANTIZATION = "none"
+
+# Serve exported models through ONNX Runtime on CPU ("torch" or "onnx"); any model
+# without an exported artifact in ONNX_MODEL_DIR keeps using PyTorch
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "onnx_models")
+if INFERENCE_BACKEND == "onnx" and not onnx_runtime_available():
+    print("optimum[onnxruntime] is not installed, serving PyTorch models")
+    INFERENCE_BACKEND = "torch"
+
+def onnx_model_path(name):
+    """Directory of the exported ONNX model to serve for name, or None to use PyTorch"""
+    path = os.path.join(ONNX_MODEL_DIR, name)
+    if INFERENCE_BACKEND != "onnx":
+        return None
+    if not has_onnx_model(path):
+        print(f"No ONNX export of {name} in {ONNX_MODEL_DIR}, falling back to PyTorch")
+        return None
+    return path
+
+def model_backend(model, is_sklearn=False):
+    """Name of the runtime serving a loaded model, as reported by /stats"""
+    if is_sklearn:
+        return "sklearn"
+    return "torch" if isinstance(model, torch.nn.Module) else "onnxruntime"
+
+def prepare_model(model):
+    """Put a loaded transformers model in eval mode, quantizing it if configured"""
+    if MODEL_QUANTIZATION == "int8":
+        return quantize_dynamic_int8(model)
+    return model.eval()
+
+SENTIMENT_LABELS = ["positive", "negative", "neutral"]
+URGENCY_LABELS = ["high", "low"]
+FRAUD_LABELS = ["fraud", "legit"]
+
+bert_tokenizer = None
+bert_tokenizer_lock = threading.Lock()
+
+def load_bert_tokenizer():
+    """Load the DistilBERT tokenizer shared by all three classifier heads"""
+    global bert_tokenizer
+    # Classifiers may be loading concurrently; only one of them loads the tokenizer
+    with bert_tokenizer_lock:
+        if bert_tokenizer is None:
+            bert_tokenizer = DistilBertTokenizer.from_pretrained("distilbert-base-uncased")
+    return bert_tokenizer
+
+def load_classifier(name):
+    """Load a classifier, preferring the scikit-learn pipeline; returns (model, is_sklearn)"""
+    try:
+        model = joblib.load(f"./{name}_model/{name}_model.joblib")
+        print(f"Loaded {name}_model")
+        return model, True
+    except FileNotFoundError:
+        print(f"{name}_model not found, will use default distilbert")
+        load_bert_tokenizer()
+        onnx_path = onnx_model_path(f"{name}_model")
+        if onnx_path is not None:
+            print(f"Loaded {name}_model with ONNX Runtime")
+            return load_onnx_classifier(onnx_path), False
+        model = prepare_model(DistilBertForSequenceClassification.from_pretrained(f"./{name}_model").to(device))
+        return model, False
+
+# Classifiers are loaded on first use unless load_all() is called; main.py
+# registers the response generator in the same registry
+models = ModelRegistry()
+models.register("sentiment", lambda: load_classifier("sentiment"))
+models.register("urgency", lambda: load_classifier("urgency"))
+models.register("fraud", lambda: load_classifier("fraud"))
+
+def clean_text(text):
+    if not isinstance(text, str):
+        return ""
+    text = text.lower()
+    text = ' '.join(text.split())
+    return text
+
+def predict_with_sklearn(model, text):
+    """Use a scikit-learn pipeline model for prediction"""
+    return predict_with_sklearn_batch(model, [text])[0]
+
+def predict_with_sklearn_batch(model, texts):
+    """Use a scikit-learn pipeline model for prediction on a batch of texts"""
+    if isinstance(model, Pipeline):
+        return predict_sklearn_heads([model], texts)[0]
+    else:
+        # Fallback to the original prediction method
+        return [predict(model, bert_tokenizer, text) for text in texts]
+
+def sklearn_feature_key(model):
+    """Fingerprint of a pipeline's fitted preprocessing steps, cached on the pipeline"""
+    key = getattr(model, "_feature_key", None)
+    if key is None:
+        # A pipeline that is only a classifier consumes the cleaned text directly
+        key = joblib.hash(model[:-1]) if len(model.steps) > 1 else "text"
+        model._feature_key = key
+    return key
+
+def predict_sklearn_heads(models, texts, names=None):
+    """Run several scikit-learn pipelines on a batch of texts with one predict_proba call each.
+
+    Pipelines whose preprocessing steps were fitted identically share a single
+    transform of the batch. Returns one list per pipeline holding a
+    (class, probability) pair per text.
+    """
+    cleaned_texts = [clean_text(text) for text in texts]
+    features = {}
+    results = []
+    for model, name in zip(models, names or ["classifier"] * len(models)):
+        key = sklearn_feature_key(model)
+        if key not in features:
+            # The vectorizer steps are the tokenization stage of the scikit-learn path
+            with stage_seconds.time(stage="tokenize"):
+                features[key] = model[:-1].transform(cleaned_texts) if len(model.steps) > 1 else cleaned_texts
+        with stage_seconds.time(stage=f"classify_{name}"):
+            probas = model.steps[-1][1].predict_proba(features[key])
+        # The predicted label is the most probable class, so predict() is not needed
+        best = probas.argmax(axis=1)
+        results.append([
+            (int(model.classes_[index]), float(row[index])) for index, row in zip(best, probas)
+        ])
+    return results
+
+def predict(model, tokenizer, text):
+    """Original prediction method using transformers models"""
+    return predict_heads([model], tokenizer, [text])[0][0]
+
+def run_head(model, name, inputs):
+    """Forward one classifier head, timing it as its own stage"""
+    with stage_seconds.time(stage=f"classify_{name}"):
+        # ONNX Runtime heads take CPU tensors even when the PyTorch heads are on the GPU
+        return model(**{key: value.to(model.device) for key, value in inputs.items()})
+
+def predict_heads(models, tokenizer, texts, names=None):
+    """Run several DistilBERT heads on one padded tokenization of a batch of texts.
+
+    The heads run one after another, each as a single batched forward pass;
+    torch parallelizes inside each pass across its intra-op threads.
+    Returns one list per head holding a (class, softmax probability) pair per text.
+    """
+    if not models or not texts:
+        return [[] for _ in models]
+    with stage_seconds.time(stage="tokenize"):
+        inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
+    with torch.no_grad():
+        logits = [
+            run_head(model, name, inputs).logits
+            for model, name in zip(models, names or ["classifier"] * len(models))
+        ]
+    results = []
+    for head_logits in logits:
+        probas = torch.softmax(head_logits, dim=-1)
+        confidences, pred_classes = probas.max(dim=-1)
+        results.append([(int(c), float(p)) for c, p in zip(pred_classes.tolist(), confidences.tolist())])
+    return results
+
+def classify_complaint(text):
+    """Classify sentiment, urgency and fraud, sharing one tokenization across the DistilBERT heads"""
+    return classify_batch([text])[0]
+
+def classify_batch(texts):
+    """Classify a batch of complaint texts with all three models in a single padded pass"""
+    heads = [
+        ("sentiment", *models.get("sentiment"), SENTIMENT_LABELS),
+        ("urgency", *models.get("urgency"), URGENCY_LABELS),
+        ("fraud", *models.get("fraud"), FRAUD_LABELS),
+    ]
+    predictions = {}
+    sklearn_heads = []
+    bert_heads = []
+    for name, model, is_sklearn, _ in heads:
+        if is_sklearn and isinstance(model, Pipeline):
+            sklearn_heads.append((name, model))
+        elif is_sklearn:
+            predictions[name] = predict_with_sklearn_batch(model, texts)
+        else:
+            bert_heads.append((name, model))
+
+    sklearn_predictions = predict_sklearn_heads(
+        [model for _, model in sklearn_heads], texts, [name for name, _ in sklearn_heads]
+    ) if sklearn_heads else []
+    for (name, _), head_predictions in zip(sklearn_heads, sklearn_predictions):
+        predictions[name] = head_predictions
+
+    bert_predictions = predict_heads(
+        [model for _, model in bert_heads], bert_tokenizer, texts, [name for name, _ in bert_heads]
+    )
+    for (name, _), head_predictions in zip(bert_heads, bert_predictions):
+        predictions[name] = head_predictions
+
+    results = []
+    for i in range(len(texts)):
+        result = {}
+        for name, _, _, labels in heads:
+            pred_class, confidence = predictions[name][i]
+            result[name] = labels[pred_class]
+            result[f"{name}_confidence"] = confidence
+        results.append(result)
+    return results
@@ -0,0 +1,167 @@
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """State of one queued unit of work"""
+
+    def __init__(self, job_id, payload):
+        self.job_id = job_id
+        self.payload = payload
+        self.status = PENDING
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.chunks = []
+        # The submitter's context variables, so request-scoped state follows the job
+        self.context = contextvars.copy_context()
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk):
+        """Record a partial output chunk and wake any listeners; call from the event loop"""
+        self.chunks.append(chunk)
+        self.notify()
+
+    def notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_update(self, timeout=None):
+        """Wait until the job publishes output or changes status; False on timeout"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def to_dict(self):
+        return {
+            "complaint_id": self.job_id,
+            "status": self.status,
+            "stage": self.stage,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Queue of jobs processed by a fixed number of asyncio worker tasks.
+
+    handler is an async function that receives the Job and returns its result.
+    Finished jobs are kept for status lookups up to history_size entries.
+    on_change, if given, is called with the Job when a worker starts it and
+    when it finishes, from the event loop.
+    """
+
+    def __init__(self, handler, num_workers=4, max_size=0, history_size=10000, on_change=None):
+        self.handler = handler
+        self.on_change = on_change
+        self.num_workers = max(1, int(num_workers))
+        self.max_size = max_size
+        self.history_size = history_size
+        self.jobs = OrderedDict()
+        self._queue = None
+        self._workers = []
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.num_workers)]
+
+    async def stop(self):
+        """Cancel the worker tasks; jobs still queued stay pending"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, job_id, payload):
+        """Enqueue a job without waiting; raises asyncio.QueueFull when the queue is bounded and full"""
+        self.start()
+        job = Job(job_id, payload)
+        self._queue.put_nowait(job)
+        self.jobs[job_id] = job
+        self._trim()
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def active_ids(self):
+        """IDs of the jobs that are queued or running"""
+        return [job_id for job_id, job in self.jobs.items() if job.status in (PENDING, RUNNING)]
+
+    def _trim(self):
+        # Drop the oldest finished jobs once the history is full
+        while len(self.jobs) > self.history_size:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest.status not in (DONE, FAILED):
+                break
+            del self.jobs[oldest_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.notify()
+            self._changed(job)
+            # The handler runs as its own task in the submitter's context
+            task = job.context.run(asyncio.ensure_future, self.handler(job))
+            try:
+                job.result = await task
+                job.status = DONE
+                self.completed += 1
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            except Exception as e:
+                print(f"Job {job.job_id} failed: {e}")
+                job.error = str(e)
+                job.status = FAILED
+                self.failed += 1
+            finally:
+                job.finished_at = time.time()
+                job.notify()
+                self._changed(job)
+                self._queue.task_done()
+
+    def _changed(self, job):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(job)
+        except Exception as e:
+            print(f"Job {job.job_id} status listener failed: {e}")
+
+    def stats(self):
+        """Return queue depth and job counters"""
+        statuses = {PENDING: 0, RUNNING: 0}
+        for job in self.jobs.values():
+            if job.status in statuses:
+                statuses[job.status] += 1
+        return {
+            "workers": self.num_workers,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "pending": statuses[PENDING],
+            "running": statuses[RUNNING],
+            "completed": self.completed,
+            "failed": self.failed,
+        }
@@ -0,0 +1,105 @@
+import re
+
+try:
+    import ahocorasick
+except ImportError:  # Without pyahocorasick all keywords share one compiled regular expression
+    ahocorasick = None
+
+DEFAULT_GROUP = "match"
+
+
+class KeywordMatcher:
+    """Substring keyword sets compiled once and matched in a single pass per text.
+
+    keywords is either a list, or a dict mapping group names to lists when
+    one text has to be checked against several keyword sets at once (a
+    keyword may belong to several groups). Matching is plain substring
+    matching, like `keyword in text`, and case-insensitive unless lowercase
+    is False.
+
+    With pyahocorasick installed all groups share one Aho-Corasick automaton,
+    so a text is scanned once however many keywords there are. Otherwise all
+    keywords form one compiled alternation, also scanned once per text, and
+    each match is mapped back to the groups of its keyword.
+    """
+
+    def __init__(self, keywords, lowercase=True):
+        if not isinstance(keywords, dict):
+            keywords = {DEFAULT_GROUP: keywords}
+        self.lowercase = lowercase
+        self.groups_by_keyword = {}
+        for group, words in keywords.items():
+            for word in words:
+                word = word.lower() if lowercase else word
+                self.groups_by_keyword.setdefault(word, set()).add(group)
+        self.group_names = frozenset(keywords)
+        self._automaton = None
+        self._pattern = None
+        if ahocorasick is not None and self.groups_by_keyword:
+            self._automaton = ahocorasick.Automaton()
+            for word, groups in self.groups_by_keyword.items():
+                self._automaton.add_word(word, (word, frozenset(groups)))
+            self._automaton.make_automaton()
+        elif self.groups_by_keyword:
+            words = sorted(self.groups_by_keyword, key=len, reverse=True)
+            # The alternation reports only the longest keyword starting at each position, so each
+            # keyword also stands for the shorter keywords it contains, and their groups
+            self._prefixes = {word: [other for other in words if word.startswith(other)] for word in words}
+            self._contained_groups = {
+                word: frozenset().union(*(self.groups_by_keyword[other] for other in words if other in word))
+                for word in words
+            }
+            # A lookahead matches at every position, so overlapping keywords are all seen in one scan
+            self._pattern = re.compile("(?=(" + "|".join(re.escape(word) for word in words) + "))")
+
+    def _prepare(self, text):
+        if not isinstance(text, str):
+            return ""
+        return text.lower() if self.lowercase else text
+
+    def groups(self, text):
+        """Set of groups with at least one keyword in the text"""
+        text = self._prepare(text)
+        if self._automaton is not None:
+            matches = (groups for _, (_, groups) in self._automaton.iter(text))
+        elif self._pattern is not None:
+            matches = (self._contained_groups[match.group(1)] for match in self._pattern.finditer(text))
+        else:
+            return frozenset()
+        found = set()
+        for groups in matches:
+            found.update(groups)
+            if len(found) == len(self.group_names):
+                break
+        return frozenset(found)
+
+    def contains(self, text, group=DEFAULT_GROUP):
+        """Whether any keyword of the group occurs in the text"""
+        text = self._prepare(text)
+        if self._automaton is not None:
+            return any(group in groups for _, (_, groups) in self._automaton.iter(text))
+        if self._pattern is None:
+            return False
+        return any(group in self._contained_groups[match.group(1)] for match in self._pattern.finditer(text))
+
+    def find(self, text):
+        """Every keyword occurrence in the text, as (start, keyword) pairs in text order"""
+        text = self._prepare(text)
+        if self._automaton is not None:
+            # The automaton reports the index of each match's last character
+            return sorted((end - len(word) + 1, word) for end, (word, _) in self._automaton.iter(text))
+        if self._pattern is None:
+            return []
+        return sorted(
+            (match.start(), word)
+            for match in self._pattern.finditer(text)
+            for word in self._prefixes[match.group(1)]
+        )
+
+    def groups_many(self, texts):
+        """groups() for each text of an iterable, such as a pandas Series"""
+        return [self.groups(text) for text in texts]
+
+    def contains_many(self, texts, group=DEFAULT_GROUP):
+        """contains() for each text of an iterable, such as a pandas Series"""
+        return [self.contains(text, group) for text in texts]
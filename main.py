@@ -1,37 +1,162 @@
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, EmailStr
 import torch
-from transformers import DistilBertTokenizer, DistilBertForSequenceClassification, GPT2Tokenizer, GPT2LMHeadModel
+from transformers import GPT2Tokenizer, GPT2LMHeadModel, TextStreamer
+from transformers.generation.streamers import BaseStreamer
 import uvicorn
 import time
+import asyncio
+import copy
+import base64
+import secrets
 import random
 import string
 import json
 import os
-import joblib
-import numpy as np
-import smtplib
-import statistics
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from sklearn.pipeline import Pipeline
-from typing import Dict, List, Optional, Any, Union
-from datetime import datetime
+from typing import Dict, Optional, Any
+from batching import MicroBatcher
+from executors import InstrumentedExecutor
+from jobs import JobQueue, PENDING, RUNNING, DONE, FAILED
+from response_cache import ResponseCache
+from complaint_storage import open_storage, migrate_legacy_json
+from analytics import ComplaintAnalytics
+from email_notifications import EmailOutbox, SMTPConnectionPool
+from metrics import MetricsRegistry
+from profiling import Profiler
+from shared_state import IdAllocator, JobStateTable
+from bulk_submission import BulkNDJSONResponse
+from fast_path import FastPathRouter, UNCLASSIFIED, is_empty, is_greeting, empty_response, greeting_response
+from onnx_backend import load_onnx_causal_lm
+from inference import (
+    classify_batch, clean_text, device, model_backend, models, onnx_model_path, prepare_model, stage_seconds
+)
+from user_store import UserStore, UserExistsError, hash_password, verify_password, hash_iterations, migrate_users_json
 
 # Create data directory if it doesn't exist
 os.makedirs("data", exist_ok=True)
 
-# Initialize complaints file if it doesn't exist
-if not os.path.exists("data/complaints.json"):
-    with open("data/complaints.json", "w") as f:
-        json.dump({"complaints": []}, f)
+# Complaints are persisted in an append-only store ("jsonl" or "sqlite")
+COMPLAINT_STORAGE = os.getenv("COMPLAINT_STORAGE", "jsonl")
+COMPLAINT_STORAGE_PATH = os.getenv("COMPLAINT_STORAGE_PATH") or None
+COMPLAINT_STORAGE_FSYNC = os.getenv("COMPLAINT_STORAGE_FSYNC", "1") == "1"
+LEGACY_COMPLAINTS_FILE = os.getenv("LEGACY_COMPLAINTS_FILE", "data/complaints.json")
+
+complaint_storage = open_storage(COMPLAINT_STORAGE, COMPLAINT_STORAGE_PATH, fsync=COMPLAINT_STORAGE_FSYNC)
+
+# Carry over complaints saved by older versions the first time the new store is used;
+# when several worker processes start together only one of them migrates
+if os.path.exists(LEGACY_COMPLAINTS_FILE):
+    migrated = migrate_legacy_json(LEGACY_COMPLAINTS_FILE, complaint_storage)
+    if migrated:
+        print(f"Migrated {migrated} complaints from {LEGACY_COMPLAINTS_FILE} to {COMPLAINT_STORAGE} storage")
+
+# Users are stored by email; passwords are salted PBKDF2 hashes computed on a
+# dedicated pool so hashing never blocks the event loop
+USER_STORE_PATH = os.getenv("USER_STORE_PATH", "data/users.db")
+LEGACY_USERS_FILE = os.getenv("LEGACY_USERS_FILE", "data/users.json")
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000"))
+PASSWORD_HASH_POOL_SIZE = int(os.getenv("PASSWORD_HASH_POOL_SIZE", str(os.cpu_count() or 2)))
+
+user_store = UserStore(USER_STORE_PATH)
+
+# Import users registered by older versions, hashing their plaintext passwords and removing them from disk
+if os.path.exists(LEGACY_USERS_FILE):
+    migrated = migrate_users_json(LEGACY_USERS_FILE, user_store, PASSWORD_HASH_ITERATIONS)
+    if migrated:
+        print(f"Migrated {migrated} users from {LEGACY_USERS_FILE} to {USER_STORE_PATH}")
+
+# Complaint notifications go through a persistent outbox. With EMAIL_DELIVERY=log
+# they are only printed; "smtp" sends them over pooled, reused SMTP connections
+EMAIL_DELIVERY = os.getenv("EMAIL_DELIVERY", "log")
+EMAIL_SENDER = os.getenv("EMAIL_SENDER", "no-reply@ai-grievance.com")
+EMAIL_SMTP_HOST = os.getenv("EMAIL_SMTP_HOST", "localhost")
+EMAIL_SMTP_PORT = int(os.getenv("EMAIL_SMTP_PORT", "587"))
+EMAIL_SMTP_USERNAME = os.getenv("EMAIL_SMTP_USERNAME") or None
+EMAIL_SMTP_PASSWORD = os.getenv("EMAIL_SMTP_PASSWORD") or None
+EMAIL_SMTP_STARTTLS = os.getenv("EMAIL_SMTP_STARTTLS", "1") == "1"
+EMAIL_OUTBOX_PATH = os.getenv("EMAIL_OUTBOX_PATH", "data/outbox.db")
+EMAIL_SENDERS = int(os.getenv("EMAIL_SENDERS", "2"))
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "5"))
+# Messages claimed this long ago by a sender that never finished are sent again
+EMAIL_CLAIM_TIMEOUT_SECONDS = float(os.getenv("EMAIL_CLAIM_TIMEOUT_SECONDS", "600"))
+
+smtp_pool = None
+if EMAIL_DELIVERY == "smtp":
+    smtp_pool = SMTPConnectionPool(
+        EMAIL_SMTP_HOST, EMAIL_SMTP_PORT, EMAIL_SMTP_USERNAME, EMAIL_SMTP_PASSWORD,
+        starttls=EMAIL_SMTP_STARTTLS, max_size=EMAIL_SENDERS
+    )
+email_outbox = EmailOutbox(
+    EMAIL_OUTBOX_PATH, EMAIL_SENDER, pool=smtp_pool, senders=EMAIL_SENDERS, batch_size=EMAIL_BATCH_SIZE,
+    max_attempts=EMAIL_MAX_ATTEMPTS, retry_base_seconds=EMAIL_RETRY_BASE_SECONDS,
+    claim_timeout_seconds=EMAIL_CLAIM_TIMEOUT_SECONDS
+)
+
+# Page sizes for the cursor-paginated /complaints endpoint
+COMPLAINTS_PAGE_SIZE = int(os.getenv("COMPLAINTS_PAGE_SIZE", "100"))
+COMPLAINTS_MAX_PAGE_SIZE = int(os.getenv("COMPLAINTS_MAX_PAGE_SIZE", "1000"))
+# Records read per /complaints request; a filter matching few of them returns a short page and a cursor
+COMPLAINTS_MAX_SCAN = int(os.getenv("COMPLAINTS_MAX_SCAN", "10000"))
+
+# Analytics counters follow complaint storage, so every worker process reports
+# the complaints saved by all of them
+complaint_analytics = ComplaintAnalytics(complaint_storage)
+complaint_analytics.rebuild()
+
+# Dynamic micro-batching of concurrent classification requests
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+
+# Bulk NDJSON submissions are classified and persisted this many items at a time
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", str(BATCH_MAX_SIZE)))
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", str(1024 * 1024)))
 
-# Initialize users file if it doesn't exist
-if not os.path.exists("data/users.json"):
-    with open("data/users.json", "w") as f:
-        json.dump({"users": []}, f)
+# Blocking model inference and file persistence run in bounded thread pools
+# so the event loop stays free to serve other requests
+INFERENCE_POOL_SIZE = int(os.getenv("INFERENCE_POOL_SIZE", "2"))
+IO_POOL_SIZE = int(os.getenv("IO_POOL_SIZE", "4"))
+inference_executor = InstrumentedExecutor("inference", INFERENCE_POOL_SIZE)
+io_executor = InstrumentedExecutor("io", IO_POOL_SIZE)
+hash_executor = InstrumentedExecutor("password-hashing", PASSWORD_HASH_POOL_SIZE)
+
+# Background complaint processing pipeline
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "1000"))
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+# Cache for repeated complaints, keyed on the normalized text and category
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_ID_PLACEHOLDER = "{complaint_id}"
+
+# Prometheus metrics served on /metrics
+metrics = MetricsRegistry()
+metrics.register(stage_seconds)
+complaint_seconds = metrics.histogram(
+    "complaint_processing_seconds", "Time from submission until a complaint is stored", ["source"]
+)
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Time until response headers are sent, by route", ["method", "route", "status"]
+)
+complaints_submitted = metrics.counter("complaints_submitted_total", "Complaints accepted for processing")
+complaints_rejected = metrics.counter("complaints_rejected_total", "Complaints rejected because the job queue was full")
+notifications_failed = metrics.counter(
+    "notifications_failed_total", "Notifications that could not be queued for complaints that were saved"
+)
+
+# Opt-in request profiling: requests carrying the X-Profile header (when
+# PROFILE_HEADER_ENABLED=1) or a sampled fraction of traffic write CPU (and
+# optionally tracemalloc) profiles of the decorated functions to PROFILE_DIR
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_HEADER_ENABLED = os.getenv("PROFILE_HEADER_ENABLED", "0") == "1"
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "0") == "1"
+profiler = Profiler(PROFILE_DIR, PROFILE_SAMPLE_RATE, PROFILE_HEADER_ENABLED, PROFILE_TRACEMALLOC)
 
 app = FastAPI()
 
@@ -43,50 +168,93 @@ app.add_middleware(
     allow_origins=["*"]
 )
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-print(f"Using device: {device}")
-
-# Load scikit-learn models for classification
-try:
-    sentiment_model = joblib.load("./sentiment_model/sentiment_model.joblib")
-    print("Loaded sentiment_model")
-    is_sklearn_sentiment = True
-except FileNotFoundError:
-    print("sentiment_model not found, will use default distilbert")
-    bert_tokenizer = DistilBertTokenizer.from_pretrained("distilbert-base-uncased")
-    sentiment_model = DistilBertForSequenceClassification.from_pretrained("./sentiment_model").to(device)
-    is_sklearn_sentiment = False
-
-try:
-    urgency_model = joblib.load("./urgency_model/urgency_model.joblib")
-    print("Loaded urgency_model")
-    is_sklearn_urgency = True
-except FileNotFoundError:
-    print("urgency_model not found, will use default distilbert")
-    urgency_model = DistilBertForSequenceClassification.from_pretrained("./urgency_model").to(device)
-    is_sklearn_urgency = False
-
-try:
-    fraud_model = joblib.load("./fraud_model/fraud_model.joblib")
-    print("Loaded fraud_model")
-    is_sklearn_fraud = True
-except FileNotFoundError:
-    print("fraud_model not found, will use default distilbert")
-    fraud_model = DistilBertForSequenceClassification.from_pretrained("./fraud_model").to(device)
-    is_sklearn_fraud = False
-
-# Load the GPT2 model for response generation
-try:
-    gpt2_tokenizer = GPT2Tokenizer.from_pretrained("./complaint_model")
-    response_model = GPT2LMHeadModel.from_pretrained("./complaint_model").to(device)
-    print("Loaded complaint_model for response generation")
-except:
-    print("complaint_model not found, will use default response_model")
-    gpt2_tokenizer = GPT2Tokenizer.from_pretrained("./response_model")
-    response_model = GPT2LMHeadModel.from_pretrained("./response_model").to(device)
-    
-if hasattr(gpt2_tokenizer, 'pad_token') and gpt2_tokenizer.pad_token is None:
-    gpt2_tokenizer.pad_token = gpt2_tokenizer.eos_token
+if profiler.enabled:
+    @app.middleware("http")
+    async def profile_requests(request: Request, call_next):
+        if not profiler.should_profile(request.headers):
+            return await call_next(request)
+        # Background work the request starts (the complaint job, executor calls) inherits the flag
+        profile_id, token = profiler.activate()
+        try:
+            response = await call_next(request)
+        finally:
+            profiler.deactivate(token)
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+def load_response_model():
+    """Load the GPT2 model for response generation; returns (tokenizer, model)"""
+    onnx_path = onnx_model_path("complaint_model")
+    if onnx_path is not None:
+        tokenizer = GPT2Tokenizer.from_pretrained(onnx_path)
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        print("Loaded complaint_model with ONNX Runtime for response generation")
+        return tokenizer, load_onnx_causal_lm(onnx_path)
+    try:
+        tokenizer = GPT2Tokenizer.from_pretrained("./complaint_model")
+        model = GPT2LMHeadModel.from_pretrained("./complaint_model").to(device)
+        print("Loaded complaint_model for response generation")
+    except:
+        print("complaint_model not found, will use default response_model")
+        tokenizer = GPT2Tokenizer.from_pretrained("./response_model")
+        model = GPT2LMHeadModel.from_pretrained("./response_model").to(device)
+        
+    if hasattr(tokenizer, 'pad_token') and tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer, prepare_model(model)
+
+# The instruction block is identical for every complaint, so it comes first in
+# the prompt and its key/value cache is computed once and reused per request
+RESPONSE_INSTRUCTIONS = """Please provide a professional, detailed, and empathetic response to the customer complaint below that:
+1. Acknowledges their concern
+2. Offers a clear path to resolution 
+3. Sets appropriate expectations
+4. Includes the complaint ID
+5. Ends with a professional closing
+"""
+
+def build_prompt_prefix_cache(gpt2_tokenizer, response_model):
+    """Prefill the static instruction prefix once, returning its token ids and past_key_values"""
+    if not isinstance(response_model, torch.nn.Module):
+        # ONNX Runtime models manage their own key/value cache and prefill the whole prompt
+        return None, None
+    try:
+        prefix_ids = gpt2_tokenizer(RESPONSE_INSTRUCTIONS, return_tensors="pt")["input_ids"].to(device)
+        with torch.no_grad():
+            outputs = response_model(input_ids=prefix_ids, use_cache=True)
+        return prefix_ids, outputs.past_key_values
+    except Exception as e:
+        print(f"Could not build prompt prefix cache, prefilling full prompts instead: {e}")
+        return None, None
+
+# Classification results and responses for repeated complaints
+response_cache = ResponseCache(max_size=RESPONSE_CACHE_SIZE, ttl_seconds=RESPONSE_CACHE_TTL)
+
+def load_response_generator():
+    """Load the response model with its prompt prefix cache; returns (tokenizer, model, prefix_ids, prefix_cache)"""
+    tokenizer, model = load_response_model()
+    return (tokenizer, model) + build_prompt_prefix_cache(tokenizer, model)
+
+# How models are loaded: "eager" loads them all concurrently before the app
+# starts, "background" starts the app at once and loads them concurrently
+# behind it, "lazy" loads each model the first time a request needs it
+MODEL_LOADING = os.getenv("MODEL_LOADING", "eager")
+# /reload-models requires this token in an X-Admin-Token header; without it the endpoint is off
+MODEL_RELOAD_TOKEN = os.getenv("MODEL_RELOAD_TOKEN") or None
+
+models.register("response", load_response_generator)
+
+def load_models():
+    """Reload the classifiers and the response model"""
+    try:
+        models.reload_all()
+    finally:
+        # Cached results were produced by the previous models, even if only some reloaded
+        response_cache.clear()
+
+if MODEL_LOADING == "eager":
+    models.load_all()
 
 class Complaint(BaseModel):
     text: str
@@ -98,101 +266,152 @@ class User(BaseModel):
     email: EmailStr
     password: str
 
+# Complaint IDs and background job status are shared through SQLite so that
+# several worker processes (uvicorn --workers) never hand out the same ID and
+# each can answer for complaints another one accepted. IDs are leased
+# COMPLAINT_ID_BLOCK_SIZE at a time, so the file is rarely touched.
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "data/shared_state.db")
+COMPLAINT_ID_BLOCK_SIZE = int(os.getenv("COMPLAINT_ID_BLOCK_SIZE", "100"))
+JOB_STATE_RETENTION_SECONDS = float(os.getenv("JOB_STATE_RETENTION_SECONDS", "86400"))
+# Unfinished jobs whose process has not refreshed them for JOB_STATE_STALE_SECONDS are reported as failed
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+JOB_STATE_STALE_SECONDS = float(os.getenv("JOB_STATE_STALE_SECONDS", "60"))
+SHARED_STATE_POLL_SECONDS = float(os.getenv("SHARED_STATE_POLL_SECONDS", "0.5"))
+
+# A new sequence starts past the complaints stored by older, per-process counters
+complaint_id_allocator = IdAllocator(
+    SHARED_STATE_PATH, "complaint_id", block_size=COMPLAINT_ID_BLOCK_SIZE, start=complaint_storage.count() + 1
+)
+job_states = JobStateTable(
+    SHARED_STATE_PATH, retention_seconds=JOB_STATE_RETENTION_SECONDS, stale_seconds=JOB_STATE_STALE_SECONDS
+)
+
+# Complaints finished by this process; the others are read back from complaint storage
 complaints_store = {}
 
-def load_complaints():
-    try:
-        with open("data/complaints.json", "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"complaints": []}
+async def new_complaint_id():
+    number = complaint_id_allocator.try_next()
+    if number is None:
+        # Leasing the next block is a SQLite transaction, kept off the event loop
+        number = await io_executor.run(complaint_id_allocator.next)
+    return f"AIGV{number:05d}{random.choice(string.ascii_uppercase)}"
 
 def save_complaint(complaint_data):
-    data = load_complaints()
-    data["complaints"].append(complaint_data)
-    with open("data/complaints.json", "w") as f:
-        json.dump(data, f, indent=2)
-
-def clean_text(text):
-    if not isinstance(text, str):
-        return ""
-    text = text.lower()
-    text = ' '.join(text.split())
-    return text
-
-def predict_with_sklearn(model, text):
-    """Use a scikit-learn pipeline model for prediction"""
-    if isinstance(model, Pipeline):
-        cleaned_text = clean_text(text)
-        probas = model.predict_proba([cleaned_text])[0]
-        pred_class = model.predict([cleaned_text])[0]
-        return pred_class, float(probas[pred_class])  # Convert numpy float to Python float
-    else:
-        # Fallback to the original prediction method
-        return predict(model, bert_tokenizer, text)
-
-def predict(model, tokenizer, text):
-    """Original prediction method using transformers models"""
-    inputs = tokenizer(text, return_tensors="pt").to(device)
-    with torch.no_grad():
-        outputs = model(**inputs)
-    return outputs.logits.argmax(-1).item(), 0.90  # Fixed confidence since we don't have actual probas
-
-def detect_financial_complaint(text):
-    """Check if a complaint is financial in nature"""
-    financial_keywords = ['refund', 'money back', 'overcharg', 'billing', 'charged twice',
-                    'double charged', 'reimbursement', 'payment', 'charged incorrectly']
-    
-    text_lower = text.lower()
-    return any(keyword in text_lower for keyword in financial_keywords)
+    # A single durable append, independent of how many complaints are stored
+    with stage_seconds.time(stage="persist"):
+        complaint_storage.append(complaint_data)
 
-def generate_financial_response(complaint_id):
-    """Generate a response for financial complaints"""
-    return f"Thank you for bringing this financial matter to our attention. We take billing concerns seriously. Please email the transaction details to support@grievance.com, referencing complaint ID {complaint_id}. Our financial team will investigate this promptly."
+def save_complaints(records):
+    """Persist several complaints with one grouped write"""
+    with stage_seconds.time(stage="persist"):
+        complaint_storage.append_many(records)
 
-def generate_response(complaint_id, category, complaint, sentiment=None, urgency=None, fraud=None):
-    """Generate appropriate response for any type of complaint in a unified function"""
-    
-    # Input validation
-    if not isinstance(complaint, str) or complaint.strip() == "":
-        return f"Thank you for reaching out (ID: {complaint_id}). It seems your message was empty. Please provide details about your concern so we can assist you properly."
+classification_batcher = MicroBatcher(
+    classify_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    executor=inference_executor
+)
+
+# Empty messages, greetings and financial complaints get template responses
+# before any model runs. FAST_PATH_ROUTES lists the enabled routes and
+# FAST_PATH_CLASSIFY the routes that still run the classifiers.
+FAST_PATH_ROUTES = [route for route in os.getenv("FAST_PATH_ROUTES", "empty,greeting,financial").split(",") if route]
+FAST_PATH_CLASSIFY = [route for route in os.getenv("FAST_PATH_CLASSIFY", "financial").split(",") if route]
+fast_path = FastPathRouter(FAST_PATH_ROUTES, FAST_PATH_CLASSIFY)
+
+class CallbackStreamer(TextStreamer):
+    """Forward each decoded chunk of newly generated text to a callback"""
+
+    def __init__(self, tokenizer, callback):
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.callback = callback
+
+    def on_finalized_text(self, text, stream_end=False):
+        if text:
+            self.callback(text)
+
+class GenerationTimer(BaseStreamer):
+    """Split generate() time into prefill and decode at the first generated token.
+
+    generate() hands the streamer the prompt first and then each new token,
+    so the second put marks the end of the prefill. Puts are forwarded to an
+    optional inner streamer.
+    """
+
+    def __init__(self, inner=None):
+        self.inner = inner
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self._puts = 0
+
+    def put(self, value):
+        self._puts += 1
+        if self._puts == 2:
+            self.first_token_at = time.perf_counter()
+        if self.inner is not None:
+            self.inner.put(value)
+
+    def end(self):
+        if self.inner is not None:
+            self.inner.end()
+
+    def observe(self):
+        finished = time.perf_counter()
+        first_token_at = self.first_token_at or finished
+        stage_seconds.observe(first_token_at - self.started, stage="prefill")
+        stage_seconds.observe(finished - first_token_at, stage="decode")
+
+@profiler.profile("generate_response")
+def generate_response(complaint_id, category, complaint, sentiment=None, urgency=None, fraud=None, on_text=None):
+    """Generate appropriate response for any type of complaint in a unified function
+
+    If on_text is given it is called with each chunk of text as GPT-2 decodes it.
+    The returned response is still the quality-checked final text.
+    """
     
-    # Check if it's a casual greeting or very short message (less than 5 words)
-    complaint_lower = complaint.lower().strip()
-    words = complaint_lower.split()
+    # Input validation; the fast path router normally catches these before classification
+    if is_empty(complaint):
+        return empty_response(complaint_id)
     
-    if len(words) <= 5:
-        greeting_phrases = ["hi", "hello", "hey", "what's up", "how are you", "good morning", "good afternoon", "good evening"]
-        if any(phrase in complaint_lower for phrase in greeting_phrases) or len(words) < 3:
-            return f"Thank you for your message (ID: {complaint_id}). It appears your message doesn't contain a specific complaint or concern. Please provide more details about your issue so that we can assist you properly."
+    # Messages that are nothing but a greeting get the greeting template
+    if is_greeting(complaint):
+        return greeting_response(complaint_id)
     
     # Use the response model with proper formatting
     try:
-        # Create prompt with comprehensive instructions
-        prompt = f"""
+        gpt2_tokenizer, response_model, prompt_prefix_ids, prompt_prefix_cache = models.get("response")
+
+        # Create prompt with comprehensive instructions; only the complaint
+        # specific suffix needs prefilling when the prefix cache is available
+        prompt_suffix = f"""
 Complaint ID: {complaint_id}
 Category: {category}
 Complaint: {complaint}
 
-Please provide a professional, detailed, and empathetic response to this customer complaint that:
-1. Acknowledges their concern
-2. Offers a clear path to resolution 
-3. Sets appropriate expectations
-4. Includes the complaint ID
-5. Ends with a professional closing
-
 Response:"""
+        prompt = RESPONSE_INSTRUCTIONS + prompt_suffix
 
-        inputs = gpt2_tokenizer(prompt, return_tensors="pt").to(device)
+        if prompt_prefix_cache is not None:
+            suffix_ids = gpt2_tokenizer(prompt_suffix, return_tensors="pt")["input_ids"].to(response_model.device)
+            input_ids = torch.cat([prompt_prefix_ids, suffix_ids], dim=1)
+            # Cache objects are extended in place by generate, so each request works on its own copy
+            past_key_values = copy.deepcopy(prompt_prefix_cache) if hasattr(prompt_prefix_cache, "get_seq_length") else prompt_prefix_cache
+        else:
+            input_ids = gpt2_tokenizer(prompt, return_tensors="pt")["input_ids"].to(response_model.device)
+            past_key_values = None
+        inputs = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
         
         with torch.no_grad():
             # Clear any leftover cached memory
             if device.type == 'cuda':
                 torch.cuda.empty_cache()
                 
+            timer = GenerationTimer(CallbackStreamer(gpt2_tokenizer, on_text) if on_text else None)
             outputs = response_model.generate(
                 input_ids=inputs["input_ids"],
                 attention_mask=inputs.get("attention_mask", None),
+                past_key_values=past_key_values,
                 max_length=inputs["input_ids"].shape[1] + 150,  # Add to existing length
                 temperature=0.7,
                 top_k=40,
@@ -201,8 +420,10 @@ Response:"""
                 num_return_sequences=1,
                 no_repeat_ngram_size=3,
                 repetition_penalty=1.2,
-                early_stopping=True
+                early_stopping=True,
+                streamer=timer
             )
+            timer.observe()
         
         # Extract just the generated response using a more reliable approach
         full_output = gpt2_tokenizer.decode(outputs[0], skip_special_tokens=True)
@@ -226,137 +447,270 @@ Response:"""
         return f"Thank you for your complaint (ID: {complaint_id}). We take all {category.lower()} issues seriously and are investigating your concern. A representative will follow up with you shortly to resolve this matter. We appreciate your patience and value your feedback."
 
 def send_email_notification(email: str, complaint_data: Dict[str, Any]):
-    """Send email notification with complaint details and response"""
-    
-    # In a real application, you would configure these with your actual email credentials
-    # For now, we'll just print the email content to the console
-    sender_email = "no-reply@ai-grievance.com"
-    subject = f"Your Complaint {complaint_data['complaint_id']} Has Been Processed"
-    
-    # Create a formatted HTML email
-    html_content = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto;">
-        <div style="background-color: #f7f9fc; padding: 20px; border-radius: 5px; border-left: 4px solid #2DD4BF;">
-            <h2 style="color: #1E2A44;">AI Grievance System: Complaint Processed</h2>
-            <p>Your complaint has been analyzed and processed by our AI system.</p>
-            
-            <div style="background-color: white; padding: 15px; border-radius: 4px; margin: 15px 0; border: 1px solid #eee;">
-                <p><strong>Complaint ID:</strong> {complaint_data['complaint_id']}</p>
-                <p><strong>Category:</strong> {complaint_data['category']}</p>
-                <p><strong>Submitted:</strong> {datetime.fromtimestamp(complaint_data['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}</p>
-                <p><strong>Your complaint:</strong> {complaint_data['complaint']}</p>
-            </div>
-            
-            <div style="background-color: #f0fffc; padding: 15px; border-radius: 4px; margin: 15px 0; border: 1px solid #d0ebe8;">
-                <h3 style="color: #2DD4BF; margin-top: 0;">Our Response:</h3>
-                <p>{complaint_data['response']}</p>
-            </div>
-            
-            <div style="background-color: #f7f9fc; padding: 15px; border-radius: 4px; margin: 15px 0; border: 1px solid #eee;">
-                <h3 style="margin-top: 0;">AI Analysis:</h3>
-                <p><strong>Sentiment:</strong> {complaint_data['sentiment']}</p>
-                <p><strong>Urgency:</strong> {complaint_data['urgency']}</p>
-                <p><strong>Fraud Assessment:</strong> {complaint_data['fraud']}</p>
-            </div>
-            
-            <p>Thank you for using our AI Grievance System.</p>
-            <p style="font-size: 12px; color: #666;">This is an automated message. Please do not reply directly to this email.</p>
-        </div>
-    </body>
-    </html>
-    """
-    
-    # For demonstration, we'll just print the email content
-    print(f"Would send email to {email} with subject '{subject}'")
-    print("Email content would be HTML formatted with complaint details")
-    
-    # In a real app, you would use something like this:
-    # msg = MIMEMultipart('alternative')
-    # msg['Subject'] = subject
-    # msg['From'] = sender_email
-    # msg['To'] = email
-    # 
-    # msg.attach(MIMEText(html_content, 'html'))
-    # 
-    # with smtplib.SMTP('smtp.yourprovider.com', 587) as server:
-    #     server.starttls()
-    #     server.login(username, password)
-    #     server.send_message(msg)
+    """Queue an email notification with complaint details and response"""
+    with stage_seconds.time(stage="email_enqueue"):
+        email_outbox.enqueue(email, complaint_data)
 
-@app.post("/submit-complaint")
-async def submit_complaint(complaint: Complaint, background_tasks: BackgroundTasks):
-    print(f"Received POST: {complaint.text}, {complaint.category}")
-    complaint_id = f"AIGV{len(complaints_store) + 1:05d}{random.choice(string.ascii_uppercase)}"
-    
-    # Use different prediction methods based on the model type
-    if is_sklearn_sentiment:  
-        sentiment, sentiment_confidence = predict_with_sklearn(sentiment_model, complaint.text)
-        sentiment_label = ["positive", "negative", "neutral"][sentiment]
-    else:
-        sentiment, sentiment_confidence = predict(sentiment_model, bert_tokenizer, complaint.text)
-        sentiment_label = ["positive", "negative", "neutral"][sentiment]
-    
-    if is_sklearn_urgency:
-        urgency, urgency_confidence = predict_with_sklearn(urgency_model, complaint.text)
-        urgency_label = ["high", "low"][urgency]
-    else:
-        urgency, urgency_confidence = predict(urgency_model, bert_tokenizer, complaint.text)
-        urgency_label = ["high", "low"][urgency]
-    
-    if is_sklearn_fraud:
-        fraud, fraud_confidence = predict_with_sklearn(fraud_model, complaint.text)
-        fraud_label = ["fraud", "legit"][fraud]
+async def notify(email, complaint_data):
+    """Queue a notification for a saved complaint; a failure is logged and never fails the complaint"""
+    try:
+        await io_executor.run(send_email_notification, email, complaint_data)
+    except Exception as e:
+        notifications_failed.inc()
+        print(f"Could not queue notification for {complaint_data['complaint_id']}: {e}")
+
+async def process_complaint(job):
+    """Background pipeline for one complaint: classify -> generate -> persist"""
+    complaint = job.payload
+    complaint_id = job.job_id
+    stage_seconds.observe(time.time() - job.created_at, stage="queue_wait")
+    started = time.perf_counter()
+
+    # Greetings, empty and financial complaints skip GPT-2 (and optionally the classifiers)
+    route = fast_path.route(complaint.text)
+    cached = None
+    # Read before classifying so a result computed across a model reload is not cached
+    cache_generation = response_cache.generation
+    if route is None:
+        # Normalized resubmissions reuse the earlier classification and response
+        cache_key = (clean_text(complaint.text), clean_text(complaint.category))
+        cached = response_cache.get(cache_key)
+
+    if route is not None:
+        job.stage = f"fast_path_{route}"
+        if fast_path.classifies(route):
+            classification = await classification_batcher.submit(complaint.text)
+        else:
+            classification = dict(UNCLASSIFIED)
+        response = fast_path.respond(route, complaint_id)
+        job.publish(response)
+        fast_path.record(route, time.perf_counter() - started)
+    elif cached is not None:
+        job.stage = "cache"
+        classification = cached["classification"]
+        response = cached["response_template"].replace(RESPONSE_ID_PLACEHOLDER, complaint_id)
     else:
-        fraud, fraud_confidence = predict(fraud_model, bert_tokenizer, complaint.text)
-        fraud_label = ["fraud", "legit"][fraud]
-    
-    response = generate_response(complaint_id, complaint.category, complaint.text, sentiment_label, urgency_label, fraud_label)
-    
+        # Concurrent complaints are collected into one padded batch for all three classifiers
+        job.stage = "classify"
+        classification = await classification_batcher.submit(complaint.text)
+        sentiment_label = classification["sentiment"]
+        urgency_label = classification["urgency"]
+        fraud_label = classification["fraud"]
+
+        # Decoded tokens are handed back to the event loop so /stream-response can forward them
+        job.stage = "generate"
+        loop = asyncio.get_running_loop()
+        response = await inference_executor.run(
+            generate_response, complaint_id, complaint.category, complaint.text, sentiment_label, urgency_label, fraud_label,
+            on_text=lambda text: loop.call_soon_threadsafe(job.publish, text)
+        )
+        response_cache.put(cache_key, {
+            "classification": classification,
+            "response_template": response.replace(complaint_id, RESPONSE_ID_PLACEHOLDER)
+        }, generation=cache_generation)
+        fast_path.record(None, time.perf_counter() - started)
+
     complaint_data = {
         "complaint_id": complaint_id,
         "category": complaint.category,
         "complaint": complaint.text,
-        "sentiment": sentiment_label,
-        "sentiment_confidence": sentiment_confidence,
-        "urgency": urgency_label,
-        "urgency_confidence": urgency_confidence,
-        "fraud": fraud_label,
-        "fraud_confidence": fraud_confidence,
+        **classification,
         "response": response,
-        "timestamp": time.time()
+        "timestamp": job.created_at
     }
-    
-    # Add optional email notification
+    if route is not None:
+        complaint_data["fast_path"] = route
     if complaint.notify_email:
         complaint_data["notify_email"] = complaint.notify_email
-        background_tasks.add_task(send_email_notification, complaint.notify_email, complaint_data)
-    
+
+    # Append to complaint storage
+    job.stage = "persist"
     complaints_store[complaint_id] = complaint_data
-    
-    # Save to JSON file
-    save_complaint(complaint_data)
-    
-    return {"complaint_id": complaint_id, "message": "Complaint submitted, processing..."}
+    await io_executor.run(save_complaint, complaint_data)
+
+    # Add optional email notification
+    if complaint.notify_email:
+        job.stage = "notify"
+        await notify(complaint.notify_email, complaint_data)
+
+    source = "fast_path" if route is not None else "cache" if cached is not None else "model"
+    complaint_seconds.observe(time.time() - job.created_at, source=source)
+    return complaint_data
+
+# Job status writes still in flight; awaited at shutdown so the last statuses are recorded
+job_state_writes = set()
+
+def publish_job_state(job):
+    """Record a job's new status for the other worker processes, off the event loop"""
+    # Writes may land out of order; the table ignores any that would move a job backwards
+    task = asyncio.ensure_future(io_executor.run(job_states.record, job.to_dict()))
+    job_state_writes.add(task)
+    task.add_done_callback(job_state_written)
+
+def job_state_written(task):
+    job_state_writes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Could not record job status: {task.exception()}")
+
+async def heartbeat_job_states():
+    """Keep this process's unfinished jobs from being reported as abandoned"""
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        job_ids = complaint_jobs.active_ids()
+        if not job_ids:
+            continue
+        try:
+            await io_executor.run(job_states.heartbeat, job_ids)
+        except Exception as e:
+            print(f"Could not refresh job heartbeats: {e}")
+
+complaint_jobs = JobQueue(
+    process_complaint, num_workers=JOB_WORKERS, max_size=JOB_QUEUE_SIZE, on_change=publish_job_state
+)
+
+async def process_bulk_batch(items):
+    """Process one batch of a bulk submission; items are (line number, raw NDJSON line) pairs.
+
+    Valid complaints share one classification pass and one grouped write.
+    Returns one result per item, in order, with the stored complaint or the error.
+    """
+    results = {}
+    complaints = []
+    for line_number, line in items:
+        try:
+            complaints.append((line_number, Complaint(**json.loads(line))))
+        except (ValueError, TypeError) as e:
+            results[line_number] = {"line": line_number, "status": "error", "error": str(e)}
+    if complaints:
+        try:
+            records = await run_bulk_pipeline([complaint for _, complaint in complaints])
+        except Exception as e:
+            print(f"Bulk batch failed: {e}")
+            records = [None] * len(complaints)
+            for line_number, _ in complaints:
+                results[line_number] = {"line": line_number, "status": "error", "error": "Processing failed"}
+        for (line_number, _), record in zip(complaints, records):
+            if record is not None:
+                results[line_number] = {"line": line_number, "status": DONE, **record}
+    return [results[line_number] for line_number, _ in items]
+
+async def run_bulk_pipeline(complaints):
+    """Fast path, cache, one batched classification, generation and a grouped write for a list of complaints"""
+    complaints_submitted.inc(len(complaints))
+    started = time.perf_counter()
+    created_at = time.time()
+    complaint_ids = [await new_complaint_id() for _ in complaints]
+    texts = [complaint.text for complaint in complaints]
+    routes = fast_path.route_many(texts)
+    routed_seconds = (time.perf_counter() - started) / len(complaints)
+    cache_keys = [(clean_text(c.text), clean_text(c.category)) for c in complaints]
+    cache_generation = response_cache.generation
+    cached = [response_cache.get(key) if route is None else None for route, key in zip(routes, cache_keys)]
+
+    to_classify = [
+        i for i, (route, hit) in enumerate(zip(routes, cached))
+        if (route is None and hit is None) or (route is not None and fast_path.classifies(route))
+    ]
+    classified = await inference_executor.run(classify_batch, [texts[i] for i in to_classify]) if to_classify else []
+    classifications = dict(zip(to_classify, classified))
+
+    async def respond(i):
+        if routes[i] is not None:
+            return classifications.get(i, UNCLASSIFIED), fast_path.respond(routes[i], complaint_ids[i])
+        if cached[i] is not None:
+            return cached[i]["classification"], cached[i]["response_template"].replace(RESPONSE_ID_PLACEHOLDER, complaint_ids[i])
+        classification = classifications[i]
+        response = await inference_executor.run(
+            generate_response, complaint_ids[i], complaints[i].category, texts[i],
+            classification["sentiment"], classification["urgency"], classification["fraud"]
+        )
+        response_cache.put(cache_keys[i], {
+            "classification": classification,
+            "response_template": response.replace(complaint_ids[i], RESPONSE_ID_PLACEHOLDER)
+        }, generation=cache_generation)
+        return classification, response
+
+    responses = await asyncio.gather(*[respond(i) for i in range(len(complaints))])
+    # Model path items waited for the whole batch; fast path items only for routing
+    batch_seconds = time.perf_counter() - started
+    records = []
+    for i, (classification, response) in enumerate(responses):
+        record = {
+            "complaint_id": complaint_ids[i],
+            "category": complaints[i].category,
+            "complaint": texts[i],
+            **classification,
+            "response": response,
+            "timestamp": created_at
+        }
+        if routes[i] is not None:
+            record["fast_path"] = routes[i]
+            fast_path.record(routes[i], routed_seconds)
+        elif cached[i] is None:
+            fast_path.record(None, batch_seconds)
+        if complaints[i].notify_email:
+            record["notify_email"] = complaints[i].notify_email
+        complaints_store[complaint_ids[i]] = record
+        records.append(record)
+
+    await io_executor.run(save_complaints, records)
+    for record in records:
+        if record.get("notify_email"):
+            await notify(record["notify_email"], record)
+    for route, hit in zip(routes, cached):
+        source = "fast_path" if route is not None else "cache" if hit is not None else "model"
+        complaint_seconds.observe(time.time() - created_at, source=source)
+    return records
+
+@app.post("/submit-complaint")
+@profiler.profile("submit_complaint")
+async def submit_complaint(complaint: Complaint):
+    complaint_id = await new_complaint_id()
+
+    # Processing happens in the background; clients poll /get-response for the result
+    try:
+        job = complaint_jobs.submit(complaint_id, complaint)
+    except asyncio.QueueFull:
+        complaints_rejected.inc()
+        raise HTTPException(status_code=503, detail="Too many complaints are being processed, please retry shortly")
+    # Visible to every worker before the client can poll any of them
+    await io_executor.run(job_states.record, job.to_dict())
+
+    complaints_submitted.inc()
+    return {"complaint_id": complaint_id, "status": PENDING, "message": "Complaint submitted, processing..."}
+
+@app.post("/submit-complaints/bulk")
+async def submit_complaints_bulk():
+    """Submit an NDJSON stream of complaints and stream back one NDJSON result per line as batches finish.
+
+    Each result carries the input line number and either the stored
+    complaint (status "done") or an error.
+    """
+    return BulkNDJSONResponse(process_bulk_batch, batch_size=BULK_BATCH_SIZE, max_line_bytes=BULK_MAX_LINE_BYTES)
 
 @app.get("/get-response/{complaint_id}")
 async def get_response(complaint_id: str):
+    job = complaint_jobs.get(complaint_id)
+    state = job.to_dict() if job is not None else None
+    if state is None and complaint_id not in complaints_store:
+        # Submitted to another worker process, or before this one restarted
+        state = await io_executor.run(job_states.get, complaint_id)
+    if state is not None and state["status"] in (PENDING, RUNNING):
+        return JSONResponse(status_code=202, content=state)
+    if state is not None and state["status"] == FAILED:
+        raise HTTPException(status_code=500, detail=f"Processing of complaint {complaint_id} failed")
+
     if complaint_id not in complaints_store:
-        # Try to load from the JSON file
-        data = load_complaints()
-        found = False
-        for complaint in data["complaints"]:
-            if complaint["complaint_id"] == complaint_id:
-                return complaint
-                
-        if not found:
+        # Indexed lookup in complaint storage, no full scan of the history
+        complaint = await io_executor.run(complaint_storage.get, complaint_id)
+        if complaint is None:
             raise HTTPException(status_code=404, detail="Complaint ID not found")
+        return {**complaint, "status": DONE}
     
     data = complaints_store[complaint_id]
-    if time.time() - data["timestamp"] < 5:
-        time.sleep(5 - (time.time() - data["timestamp"]))
     return {
         "complaint_id": data["complaint_id"],
+        "status": DONE,
         "category": data["category"],
         "complaint": data["complaint"],
         "response": data["response"],
@@ -369,165 +723,326 @@ async def get_response(complaint_id: str):
         "timestamp": data["timestamp"]
     }
 
+@app.get("/stream-response/{complaint_id}")
+async def stream_response(complaint_id: str):
+    """Stream the generated response as Server-Sent Events while GPT-2 decodes it.
+
+    Emits "token" events with decoded text chunks, then a single "done" event
+    carrying the final quality-checked complaint record (or an "error" event).
+    """
+    job = complaint_jobs.get(complaint_id)
+    if job is None:
+        # Already finished before the stream was opened, send the final record only
+        record = await get_response(complaint_id)
+
+    async def events():
+        if job is None:
+            current = record
+            # Another worker process is handling it; poll the shared job state until it finishes
+            while isinstance(current, JSONResponse):
+                yield ": keepalive\n\n"
+                await asyncio.sleep(SHARED_STATE_POLL_SECONDS)
+                try:
+                    current = await get_response(complaint_id)
+                except HTTPException as e:
+                    yield f"event: error\ndata: {json.dumps({'complaint_id': complaint_id, 'error': e.detail})}\n\n"
+                    return
+            yield f"event: done\ndata: {json.dumps(current)}\n\n"
+            return
+        sent = 0
+        while True:
+            while sent < len(job.chunks):
+                yield f"event: token\ndata: {json.dumps(job.chunks[sent])}\n\n"
+                sent += 1
+            if job.status in (DONE, FAILED):
+                break
+            if not await job.wait_for_update(timeout=SSE_KEEPALIVE_SECONDS):
+                yield ": keepalive\n\n"
+        if job.status == FAILED:
+            yield f"event: error\ndata: {json.dumps({'complaint_id': complaint_id, 'error': job.error})}\n\n"
+        else:
+            yield f"event: done\ndata: {json.dumps({**job.result, 'status': DONE})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def encode_cursor(position, reverse):
+    return base64.urlsafe_b64encode(json.dumps([position, reverse]).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        position, reverse = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Positions are offsets or sequence numbers that storage binds as SQLite integers
+    if type(position) is not int or not 0 <= position < 2 ** 63 or type(reverse) is not bool:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position, reverse
+
+def complaint_matches(complaint, category=None, urgency=None, fraud=None, since=None, until=None):
+    """Check a stored complaint against the /complaints filters"""
+    if category is not None and complaint.get("category", "").lower() != category.lower():
+        return False
+    if urgency is not None and complaint.get("urgency", "").lower() != urgency.lower():
+        return False
+    if fraud is not None and complaint.get("fraud", "").lower() != fraud.lower():
+        return False
+    timestamp = complaint.get("timestamp", 0)
+    if since is not None and timestamp < since:
+        return False
+    if until is not None and timestamp >= until:
+        return False
+    return True
+
+def read_complaints_page(position, reverse, limit, filters, fields):
+    """Read up to limit matching complaints after position; returns (complaints, next_cursor).
+
+    At most COMPLAINTS_MAX_SCAN records are read. If the filters match fewer
+    than limit of them, the page is short and next_cursor resumes the scan.
+    """
+    page = []
+    scanned = 0
+    for record_position, complaint in complaint_storage.scan(position, reverse=reverse):
+        scanned += 1
+        if complaint_matches(complaint, **filters):
+            if fields:
+                complaint = {field: complaint[field] for field in fields if field in complaint}
+            page.append(complaint)
+        if len(page) == limit or scanned == COMPLAINTS_MAX_SCAN:
+            return page, encode_cursor(record_position, reverse)
+    return page, None
+
 @app.get("/complaints")
-async def get_complaints():
-    """Get all complaints in the system"""
-    data = load_complaints()
-    return data
+async def get_complaints(
+    limit: int = Query(COMPLAINTS_PAGE_SIZE, ge=1, le=COMPLAINTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order: str = "asc",
+    category: Optional[str] = None,
+    urgency: Optional[str] = None,
+    fraud: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    fields: Optional[str] = None,
+    format: str = "json"
+):
+    """Get one page of complaints, optionally filtered and projected to a subset of fields.
+
+    Pages follow storage order ("asc") or newest first ("desc"). Pass the
+    returned next_cursor to fetch the following page; it is null on the last page.
+    A page can be shorter than limit, or empty, and still have a next_cursor
+    when the filters match few of the records scanned for it.
+    """
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'ndjson'")
+    position, reverse = decode_cursor(cursor) if cursor else (None, order == "desc")
+    filters = {"category": category, "urgency": urgency, "fraud": fraud, "since": since, "until": until}
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+    page, next_cursor = await io_executor.run(read_complaints_page, position, reverse, limit, filters, field_list)
+
+    def ndjson_body():
+        for complaint in page:
+            yield json.dumps(complaint) + "\n"
+        yield json.dumps({"next_cursor": next_cursor}) + "\n"
+
+    def json_body():
+        yield '{"complaints": ['
+        for i, complaint in enumerate(page):
+            yield ("," if i else "") + json.dumps(complaint)
+        yield f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
+    if format == "ndjson":
+        return StreamingResponse(ndjson_body(), media_type="application/x-ndjson")
+    return StreamingResponse(json_body(), media_type="application/json")
 
 @app.get("/analytics")
+@profiler.profile("get_analytics")
 async def get_analytics():
     """Get real-time analytics of the complaints data"""
-    data = load_complaints()
-    complaints = data["complaints"]
-    
-    if not complaints:
-        return {
-            "totalComplaints": 0,
-            "resolvedPercentage": 0,
-            "urgentCases": 0,
-            "fraudCases": 0,
-            "avgResponseTime": 0,
-            "categoryCounts": {},
-            "sentimentCounts": {},
-            "monthlyComplaints": [
-                {"name": "Jan", "count": 0},
-                {"name": "Feb", "count": 0},
-                {"name": "Mar", "count": 0},
-                {"name": "Apr", "count": 0},
-                {"name": "May", "count": 0},
-                {"name": "Jun", "count": 0}
-            ]
-        }
-    
-    # Count categories and sentiments
-    category_counts = {}
-    sentiment_counts = {}
-    urgent_count = 0
-    fraud_count = 0
-    
-    for complaint in complaints:
-        # Categories
-        category = complaint["category"]
-        if category in category_counts:
-            category_counts[category] += 1
-        else:
-            category_counts[category] = 1
-            
-        # Sentiments
-        sentiment = complaint["sentiment"]
-        if sentiment in sentiment_counts:
-            sentiment_counts[sentiment] += 1
-        else:
-            sentiment_counts[sentiment] = 1
-            
-        # Count urgent and fraud cases
-        if complaint.get("urgency", "").lower() == "high":
-            urgent_count += 1
-            
-        if complaint.get("fraud", "").lower() == "fraud":
-            fraud_count += 1
-    
-    # Generate monthly data
-    now = datetime.now()
-    month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    monthly_data = []
-    
-    # Look back 6 months
-    for i in range(5, -1, -1):
-        month_idx = (now.month - 1 - i) % 12
-        target_month = month_idx + 1
-        target_year = now.year
-        if now.month - i <= 0:
-            target_year -= 1
-            
-        # Count complaints for this month
-        month_count = 0
-        for complaint in complaints:
-            complaint_date = datetime.fromtimestamp(complaint["timestamp"])
-            if complaint_date.month == target_month and complaint_date.year == target_year:
-                month_count += 1
-                
-        monthly_data.append({
-            "name": month_names[month_idx],
-            "count": month_count
-        })
-    
-    # Calculate average response time (in hours)
-    # Assuming immediate response for now, would need timestamp of when response was generated vs submitted
-    avg_response_time = 2.4  # Default to 2.4 hours
-    
-    return {
-        "totalComplaints": len(complaints),
-        "resolvedPercentage": 100,  # Assuming all are resolved
-        "urgentCases": urgent_count,
-        "fraudCases": fraud_count,
-        "avgResponseTime": avg_response_time,
-        "categoryCounts": category_counts,
-        "sentimentCounts": sentiment_counts,
-        "monthlyComplaints": monthly_data
-    }
+    # Reads the complaints stored since the previous request
+    return await io_executor.run(complaint_analytics.snapshot)
 
 # User management endpoints
+
+# Compared against when the email is unknown so failed logins take the same time
+DUMMY_PASSWORD_HASH = hash_password(secrets.token_hex(16), PASSWORD_HASH_ITERATIONS)
+
 @app.post("/register")
 async def register_user(user: User):
+    # Validate email - basic check to reject simple test emails
+    if user.email == "123@gmail.com":
+        raise HTTPException(status_code=400, detail="Please use a valid email address")
+    
+    # Check if email already exists before paying for the hash
+    if await io_executor.run(user_store.get, user.email) is not None:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    
+    password_hash = await hash_executor.run(hash_password, user.password, PASSWORD_HASH_ITERATIONS)
     try:
-        # Validate email - basic check to reject simple test emails
-        if user.email == "123@gmail.com":
-            raise HTTPException(status_code=400, detail="Please use a valid email address")
-        
-        # Load existing users
-        with open("data/users.json", "r") as f:
-            data = json.load(f)
-        
-        # Check if email already exists
-        for existing_user in data["users"]:
-            if existing_user["email"] == user.email:
-                raise HTTPException(status_code=400, detail="Email already registered")
-        
-        # Add new user
-        data["users"].append({
-            "username": user.username,
-            "email": user.email,
-            "password": user.password,  # In a real app, hash this password!
-            "created_at": time.time()
-        })
-        
-        # Save updated users
-        with open("data/users.json", "w") as f:
-            json.dump(data, f, indent=2)
-        
-        return {"message": "User registered successfully"}
+        await io_executor.run(user_store.add, user.username, user.email, password_hash, time.time())
+    except UserExistsError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
-    except FileNotFoundError:
-        # Create users file if it doesn't exist
-        with open("data/users.json", "w") as f:
-            json.dump({"users": [{
-                "username": user.username,
-                "email": user.email,
-                "password": user.password,
-                "created_at": time.time()
-            }]}, f, indent=2)
-        return {"message": "User registered successfully"}
+    return {"message": "User registered successfully"}
 
 @app.post("/login")
 async def login_user(user: dict):
-    try:
-        with open("data/users.json", "r") as f:
-            data = json.load(f)
-        
-        for existing_user in data["users"]:
-            if existing_user["email"] == user["email"] and existing_user["password"] == user["password"]:
-                return {"status": "success", "user": {"username": existing_user["username"], "email": existing_user["email"]}}
-        
+    email = user.get("email")
+    password = user.get("password")
+    if not isinstance(email, str) or not isinstance(password, str):
         return {"status": "error", "message": "Invalid credentials"}
     
-    except FileNotFoundError:
-        return {"status": "error", "message": "No users found. Please sign up first."}
+    existing_user = await io_executor.run(user_store.get, email)
+    stored_hash = existing_user["password_hash"] if existing_user else DUMMY_PASSWORD_HASH
+    valid = await hash_executor.run(verify_password, password, stored_hash)
+    if existing_user is None or not valid:
+        return {"status": "error", "message": "Invalid credentials"}
+    
+    # Upgrade hashes created with a lower cost than currently configured
+    if hash_iterations(stored_hash) < PASSWORD_HASH_ITERATIONS:
+        new_hash = await hash_executor.run(hash_password, password, PASSWORD_HASH_ITERATIONS)
+        await io_executor.run(user_store.update_password_hash, email, new_hash)
+    
+    return {"status": "success", "user": {"username": existing_user["username"], "email": existing_user["email"]}}
 
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
+    """Liveness: the process is up and serving requests, whether or not the models are loaded"""
     return {"status": "ok", "version": "1.0"}
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: which models are loaded and how long each took; 503 until the service can classify"""
+    if models.any_failed():
+        status = "failed"
+    elif models.all_loaded() or MODEL_LOADING == "lazy":
+        # Lazily loaded models are loaded by the first request that needs them
+        status = "ready"
+    else:
+        status = "loading"
+    return JSONResponse(
+        status_code=200 if status == "ready" else 503,
+        content={"status": status, "model_loading": MODEL_LOADING, "models": models.status()}
+    )
+
+def loaded_model_backends():
+    """Runtime serving each loaded model; models that are not loaded yet are left out"""
+    backends = {}
+    for name in models.names():
+        if not models.is_loaded(name):
+            continue
+        if name == "response":
+            backends[name] = model_backend(models.get(name)[1])
+        else:
+            backends[name] = model_backend(*models.get(name))
+    return backends
+
+@app.get("/stats")
+async def get_stats():
+    """Report executor queue depths and wait times alongside batching counters"""
+    return {
+        "executors": {
+            "inference": inference_executor.stats(),
+            "io": io_executor.stats(),
+            "password_hashing": hash_executor.stats()
+        },
+        "batching": classification_batcher.stats(),
+        "jobs": complaint_jobs.stats(),
+        "response_cache": response_cache.stats(),
+        "email_outbox": email_outbox.stats(),
+        "profiling": profiler.stats(),
+        "fast_path": fast_path.stats(),
+        "models": loaded_model_backends(),
+        "complaint_ids": complaint_id_allocator.stats()
+    }
+
+def executor_gauge(field):
+    return lambda: [({"executor": executor.name}, executor.stats()[field])
+                    for executor in (inference_executor, io_executor, hash_executor)]
+
+def model_gauge(field):
+    return lambda: [({"model": name}, status[field]) for name, status in models.status().items()]
+
+metrics.gauge("executor_queue_depth", "Tasks waiting for a worker thread", executor_gauge("queue_depth"), ["executor"])
+metrics.gauge("executor_active_tasks", "Tasks running on worker threads", executor_gauge("active"), ["executor"])
+metrics.gauge("job_queue_depth", "Complaints waiting for a pipeline worker", lambda: complaint_jobs.stats()["queue_depth"])
+metrics.gauge("jobs_running", "Complaints being processed", lambda: complaint_jobs.stats()["running"])
+metrics.gauge("jobs_failed", "Complaints whose processing failed since startup", lambda: complaint_jobs.stats()["failed"])
+metrics.gauge("classification_batch_queue_depth", "Texts waiting to join a classification batch",
+              lambda: classification_batcher.stats()["queued"])
+metrics.gauge("classification_avg_batch_size", "Average classification batch size",
+              lambda: classification_batcher.stats()["avg_batch_size"])
+metrics.gauge("response_cache_entries", "Entries in the response cache", lambda: response_cache.stats()["size"])
+metrics.gauge("response_cache_hit_ratio", "Share of response cache lookups that hit", lambda: response_cache.stats()["hit_rate"])
+metrics.gauge("fast_path_complaints", "Complaints answered by each fast path route",
+              lambda: [({"route": name}, route["count"]) for name, route in fast_path.stats()["routes"].items()],
+              ["route"])
+metrics.gauge("fast_path_estimated_seconds_saved", "Model time the fast path routes are estimated to have saved",
+              lambda: fast_path.stats()["estimated_seconds_saved"])
+metrics.gauge("email_outbox_pending", "Notifications waiting to be sent", lambda: email_outbox.stats()["pending"])
+metrics.gauge("model_load_seconds", "Time the last load of each model took", model_gauge("load_seconds"), ["model"])
+metrics.gauge("model_loaded", "Whether each model is loaded",
+              lambda: [({"model": name}, int(status["state"] == "loaded")) for name, status in models.status().items()],
+              ["model"])
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template so per-complaint paths do not create new series
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    http_request_seconds.observe(
+        time.perf_counter() - started, method=request.method, route=route, status=response.status_code
+    )
+    return response
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text format metrics: per-stage latency histograms, queue depths, cache and model state"""
+    return PlainTextResponse(metrics.render(), media_type=metrics.content_type)
+
+@app.post("/reload-models")
+async def reload_models(x_admin_token: Optional[str] = Header(None)):
+    """Reload all models from disk and invalidate the response cache"""
+    if MODEL_RELOAD_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token.encode(), MODEL_RELOAD_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    await inference_executor.run(load_models)
+    return {"status": "ok", "message": "Models reloaded"}
+
+job_heartbeat_task = None
+
+@app.on_event("startup")
+async def startup():
+    if MODEL_LOADING == "background":
+        models.start_background()
+    complaint_jobs.start()
+    email_outbox.start()
+    global job_heartbeat_task
+    job_heartbeat_task = asyncio.ensure_future(heartbeat_job_states())
+
+@app.on_event("shutdown")
+async def shutdown():
+    await complaint_jobs.stop()
+    if job_heartbeat_task is not None:
+        job_heartbeat_task.cancel()
+    await asyncio.gather(*job_state_writes, return_exceptions=True)
+    await classification_batcher.stop()
+    inference_executor.shutdown(wait=False)
+    io_executor.shutdown(wait=True)
+    hash_executor.shutdown(wait=False)
+    complaint_storage.close()
+    complaint_id_allocator.close()
+    job_states.close()
+    user_store.close()
+    email_outbox.close()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,30 @@
+import argparse
+import os
+
+from complaint_storage import STORAGE_BACKENDS, migrate_json_file, open_storage
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate a legacy complaints.json file into append-only complaint storage")
+    parser.add_argument("--source", default="data/complaints.json", help="legacy complaints.json to read")
+    parser.add_argument("--backend", default="jsonl", choices=sorted(STORAGE_BACKENDS), help="target storage backend")
+    parser.add_argument("--target", default=None, help="target file (defaults to the backend's standard path)")
+    parser.add_argument("--force", action="store_true", help="append even if the target already holds complaints")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        parser.error(f"{args.source} does not exist")
+
+    storage = open_storage(args.backend, args.target)
+    try:
+        existing = storage.count()
+        if existing and not args.force:
+            parser.error(f"target already holds {existing} complaints, use --force to append anyway")
+        migrated = migrate_json_file(args.source, storage)
+    finally:
+        storage.close()
+    print(f"Migrated {migrated} complaints from {args.source} into {args.backend} storage")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = "pending"
+LOADING = "loading"
+LOADED = "loaded"
+FAILED = "failed"
+
+
+class _Entry:
+    def __init__(self, loader):
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.state = PENDING
+        self.value = None
+        self.load_seconds = None
+        self.error = None
+
+
+class ModelRegistry:
+    """Named models that load concurrently, in the background or on first use.
+
+    Each model has its own lock, so a caller that needs a model which is
+    still loading waits for that load instead of starting a second one.
+    A model whose load failed is retried on the next get.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self._entries = {}
+        self._background = None
+
+    def register(self, name, loader):
+        """Register a zero-argument loader whose return value is served by get(name)"""
+        self._entries[name] = _Entry(loader)
+
+    def names(self):
+        return list(self._entries)
+
+    def get(self, name):
+        """Return the loaded model, loading it first if needed"""
+        entry = self._entries[name]
+        if entry.state == LOADED:
+            return entry.value
+        with entry.lock:
+            if entry.state != LOADED:
+                self._load(name, entry)
+            return entry.value
+
+    def is_loaded(self, name):
+        return self._entries[name].state == LOADED
+
+    def _load(self, name, entry):
+        entry.state = LOADING
+        started = time.perf_counter()
+        try:
+            value = entry.loader()
+        except Exception as e:
+            entry.state = FAILED
+            entry.error = str(e)
+            entry.load_seconds = time.perf_counter() - started
+            print(f"Failed to load {name}: {e}")
+            raise
+        entry.value = value
+        entry.error = None
+        entry.load_seconds = time.perf_counter() - started
+        entry.state = LOADED
+        print(f"Loaded {name} in {entry.load_seconds:.2f}s")
+
+    def _try_get(self, name):
+        try:
+            self.get(name)
+        except Exception:
+            pass
+
+    def load_all(self):
+        """Load every registered model concurrently and wait for all of them"""
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(self._entries) or 1,
+                                thread_name_prefix="model-loader") as pool:
+            list(pool.map(self._try_get, self._entries))
+
+    def start_background(self):
+        """Start load_all in a background thread and return immediately"""
+        if self._background is None:
+            self._background = threading.Thread(target=self.load_all, name="model-registry", daemon=True)
+            self._background.start()
+
+    def reload(self, name):
+        """Load a fresh copy of a model; the current one keeps serving until it is ready"""
+        entry = self._entries[name]
+        started = time.perf_counter()
+        value = entry.loader()
+        with entry.lock:
+            entry.value = value
+            entry.error = None
+            entry.load_seconds = time.perf_counter() - started
+            entry.state = LOADED
+
+    def reload_all(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(self._entries) or 1,
+                                thread_name_prefix="model-loader") as pool:
+            list(pool.map(self.reload, self._entries))
+
+    def all_loaded(self):
+        return all(entry.state == LOADED for entry in self._entries.values())
+
+    def any_failed(self):
+        return any(entry.state == FAILED for entry in self._entries.values())
+
+    def status(self):
+        return {
+            name: {
+                "state": entry.state,
+                "load_seconds": round(entry.load_seconds, 3) if entry.load_seconds is not None else None,
+                "error": entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
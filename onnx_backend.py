@@ -0,0 +1,47 @@
+import glob
+import os
+
+try:
+    from optimum.onnxruntime import ORTModelForCausalLM, ORTModelForSequenceClassification
+except ImportError:  # ONNX Runtime serving is optional
+    ORTModelForCausalLM = ORTModelForSequenceClassification = None
+
+ONNX_PROVIDER = "CPUExecutionProvider"
+DEFAULT_EXPORT_DIR = "onnx_models"
+
+
+def onnx_runtime_available():
+    return ORTModelForSequenceClassification is not None
+
+
+def has_onnx_model(path):
+    """Whether path holds an exported ONNX model"""
+    return bool(glob.glob(os.path.join(path, "*.onnx")))
+
+
+def load_onnx_classifier(path):
+    """Load an exported sequence classifier; it is called like the transformers model and returns .logits"""
+    return ORTModelForSequenceClassification.from_pretrained(path, provider=ONNX_PROVIDER)
+
+
+def load_onnx_causal_lm(path):
+    """Load an exported causal language model; it supports generate() like the transformers model"""
+    return ORTModelForCausalLM.from_pretrained(path, use_cache=True, provider=ONNX_PROVIDER)
+
+
+def export_classifier(source, target, tokenizer=None):
+    """Export a fine-tuned DistilBERT classifier directory to ONNX"""
+    model = ORTModelForSequenceClassification.from_pretrained(source, export=True, provider=ONNX_PROVIDER)
+    model.save_pretrained(target)
+    if tokenizer is not None:
+        tokenizer.save_pretrained(target)
+    return target
+
+
+def export_causal_lm(source, target, tokenizer=None):
+    """Export a GPT-2 model directory to ONNX with key/value cache inputs for fast decoding"""
+    model = ORTModelForCausalLM.from_pretrained(source, export=True, use_cache=True, provider=ONNX_PROVIDER)
+    model.save_pretrained(target)
+    if tokenizer is not None:
+        tokenizer.save_pretrained(target)
+    return target
@@ -1,6 +1,7 @@
 import pandas as pd
 import random
 from faker import Faker
+from keyword_matcher import KeywordMatcher
 
 # Initialize Faker for realistic text
 fake = Faker()
@@ -236,10 +237,10 @@ urgent_phrases = [
     "right away", "time-sensitive", "deadline", "crucial", "pressing",
     "can't wait", "promptly", "without delay", "expedite", "quick resolution"
 ]
+urgent_matcher = KeywordMatcher(urgent_phrases)
 
-# Generate 30,000 rows
-data = []
-for _ in range(30000):
+def generate_complaint():
+    """Generate one synthetic complaint row with its response and labels"""
     category = random.choice(categories)
     intent = random.choice(["negative", "positive", "fraud"])  # Randomly pick intent
     complaint_template, response_template = random.choice(data_templates[category][intent])
@@ -397,15 +398,14 @@ for _ in range(30000):
         response = response_template.format(**{k: v for k, v in data_dict.items() if k in response_template})
     
     # Check for urgent phrases in the complaint text
-    if any(phrase in complaint.lower() for phrase in urgent_phrases):
+    if urgent_matcher.contains(complaint):
         urgency = 0  # mark as urgent
     
     # Clean any unexpected symbols and format
     complaint = complaint.replace("\n", " ").strip()
     response = response.replace("\n", " ").strip()
     
-    # Add data to the dataset
-    data.append({
+    return {
         "category": category, 
         "intent": intent, 
         "complaint": complaint, 
@@ -413,9 +413,17 @@ for _ in range(30000):
         "sentiment": sentiment,  # 0: positive, 1: negative, 2: neutral
         "urgency": urgency,      # 0: urgent, 1: not urgent
         "fraud": fraud_flag      # 0: potential fraud, 1: not fraud
-    })
+    }
+
+def generate_complaints(n):
+    """Generate n synthetic complaint rows"""
+    return [generate_complaint() for _ in range(n)]
+
+if __name__ == "__main__":
+    # Generate 30,000 rows
+    data = generate_complaints(30000)
 
-# Save to CSV
-df = pd.DataFrame(data)
-df.to_csv("synthetic_complaints.csv", index=False)
-print(f"Generated {len(data)} rows of realistic complaints and responses, saved to synthetic_complaints.csv")
\ No newline at end of file
+    # Save to CSV
+    df = pd.DataFrame(data)
+    df.to_csv("synthetic_complaints.csv", index=False)
+    print(f"Generated {len(data)} rows of realistic complaints and responses, saved to synthetic_complaints.csv")
\ No newline at end of file
@@ -0,0 +1,201 @@
+import contextvars
+import cProfile
+import functools
+import inspect
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+
+PROFILE_HEADER = "X-Profile"
+
+# Set for the duration of a request that is being profiled, and carried into
+# executor threads and background jobs with the rest of the request context
+_active_profile = contextvars.ContextVar("active_profile", default=None)
+
+
+def _function_label(func):
+    filename, line, name = func
+    if filename == "~":
+        # Built-in functions have no source location
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def write_folded_stacks(stats, path, max_depth=64):
+    """Write a cProfile result as folded stacks for flamegraph.pl or speedscope.
+
+    cProfile only records caller/callee pairs, not whole stacks, so each
+    function's own time is split across its callers in proportion to the
+    time spent under each caller.
+    """
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, (_, _, _, caller_cumtime) in callers.items():
+            callees.setdefault(caller, []).append((func, caller_cumtime))
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    folded = {}
+
+    def walk(func, stack, share):
+        tottime = entries[func][2]
+        stack = stack + [_function_label(func)]
+        if tottime * share > 0:
+            key = ";".join(stack)
+            folded[key] = folded.get(key, 0) + tottime * share
+        if len(stack) >= max_depth:
+            return
+        for callee, edge_cumtime in callees.get(func, []):
+            callee_cumtime = entries[callee][3]
+            if callee_cumtime <= 0 or _function_label(callee) in stack:
+                continue
+            walk(callee, stack, share * edge_cumtime / callee_cumtime)
+
+    for root in roots:
+        walk(root, [], 1.0)
+    with open(path, "w") as f:
+        for stack, seconds in sorted(folded.items()):
+            microseconds = int(seconds * 1_000_000)
+            if microseconds:
+                f.write(f"{stack} {microseconds}\n")
+
+
+class Profiler:
+    """Opt-in CPU and memory profiling of selected functions for selected requests.
+
+    A request is profiled when it carries the X-Profile header (if
+    allow_header is set) or falls in the sampled fraction of traffic. Each
+    decorated function that runs for a profiled request writes a cProfile
+    .prof file and a .folded flamegraph file to output_dir, plus the top
+    tracemalloc allocation differences when trace_memory is set.
+
+    One profile runs per process at a time, because cProfile (on
+    sys.monitoring since Python 3.12) allows a single active profiler per
+    interpreter. Calls that arrive while a profile is running are not
+    profiled and are counted as skipped. A profiler that cannot start never
+    fails the call it wraps. While an async function is being profiled, the
+    profile also covers whatever else runs on the event loop. When neither
+    the header nor sampling is enabled, profile() returns the functions
+    unchanged.
+    """
+
+    def __init__(self, output_dir="profiles", sample_rate=0.0, allow_header=False, trace_memory=False):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.allow_header = allow_header
+        self.trace_memory = trace_memory
+        self.enabled = sample_rate > 0 or allow_header
+        self.profiles_written = 0
+        self.profiles_skipped = 0
+        self._lock = threading.Lock()
+        # Held for the whole of a profile, by whichever thread is running it
+        self._active = threading.Lock()
+
+    def should_profile(self, headers):
+        if self.allow_header and headers.get(PROFILE_HEADER, "").lower() in ("1", "true", "yes"):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def activate(self):
+        """Mark the current context as profiled; returns (profile_id, token for deactivate)"""
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        return profile_id, _active_profile.set(profile_id)
+
+    def deactivate(self, token):
+        _active_profile.reset(token)
+
+    def profile(self, name):
+        """Decorator profiling the function whenever it runs for a profiled request"""
+        def decorator(fn):
+            if not self.enabled:
+                return fn
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    profile_id = _active_profile.get()
+                    session = self._start() if profile_id is not None else None
+                    if session is None:
+                        return await fn(*args, **kwargs)
+                    try:
+                        return await fn(*args, **kwargs)
+                    finally:
+                        self._finish(session, profile_id, name)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                profile_id = _active_profile.get()
+                session = self._start() if profile_id is not None else None
+                if session is None:
+                    return fn(*args, **kwargs)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self._finish(session, profile_id, name)
+            return wrapper
+        return decorator
+
+    def _start(self):
+        """Start a profile; returns None when another one is running or profiling fails to start"""
+        if not self._active.acquire(blocking=False):
+            with self._lock:
+                self.profiles_skipped += 1
+            return None
+        started_tracing = False
+        try:
+            snapshot = None
+            if self.trace_memory:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    started_tracing = True
+                snapshot = tracemalloc.take_snapshot()
+            profile = cProfile.Profile()
+            # Raises if a profiler or debugger outside this class is already active
+            profile.enable()
+            return profile, snapshot, started_tracing
+        except Exception as e:
+            print(f"Could not start profiling: {e}")
+            if started_tracing:
+                tracemalloc.stop()
+            self._active.release()
+            with self._lock:
+                self.profiles_skipped += 1
+            return None
+
+    def _finish(self, session, profile_id, name):
+        profile, snapshot, started_tracing = session
+        profile.disable()
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            base = os.path.join(self.output_dir, f"{profile_id}-{name}")
+            stats = pstats.Stats(profile)
+            stats.dump_stats(base + ".prof")
+            write_folded_stacks(stats, base + ".folded")
+            if snapshot is not None:
+                differences = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+                with open(base + ".mem.txt", "w") as f:
+                    for difference in differences[:50]:
+                        f.write(f"{difference}\n")
+            with self._lock:
+                self.profiles_written += 1
+        except Exception as e:
+            print(f"Could not write profile {profile_id}-{name}: {e}")
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            self._active.release()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "header": PROFILE_HEADER if self.allow_header else None,
+            "trace_memory": self.trace_memory,
+            "output_dir": self.output_dir,
+            "profiles_written": self.profiles_written,
+            "profiles_skipped": self.profiles_skipped,
+        }
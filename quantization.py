@@ -0,0 +1,35 @@
+import io
+
+import torch
+from transformers.pytorch_utils import Conv1D
+
+
+def conv1d_to_linear(model):
+    """Replace GPT-2 style Conv1D layers with equivalent nn.Linear layers.
+
+    Conv1D stores its weight transposed relative to nn.Linear, and dynamic
+    quantization only recognises nn.Linear, so GPT-2 has to be converted first.
+    """
+    for name, module in model.named_children():
+        if isinstance(module, Conv1D):
+            in_features, out_features = module.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            linear.weight.data = module.weight.data.t().contiguous()
+            linear.bias.data = module.bias.data
+            setattr(model, name, linear)
+        else:
+            conv1d_to_linear(module)
+    return model
+
+
+def quantize_dynamic_int8(model):
+    """Move the model to CPU and quantize its linear layers to dynamic int8"""
+    model = conv1d_to_linear(model.to("cpu"))
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8).eval()
+
+
+def model_size_mb(model):
+    """Size of the serialized state dict in megabytes"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - pandas writes Parquet through pyarrow
+except ImportError:
+    pyarrow = None
+
+CHECKPOINT_FILE = "_checkpoint.json"
+# Corpora made by preprocess.py carry their own sentiment, urgency and fraud labels,
+# so predictions are written under prefixed names next to them
+PREDICTION_PREFIX = "pred_"
+PREDICTION_COLUMNS = [
+    f"{PREDICTION_PREFIX}{name}{suffix}" for name in ("sentiment", "urgency", "fraud") for suffix in ("", "_confidence")
+]
+ROW_COLUMN = "source_row"
+
+# Set in each worker process by init_worker
+classify_batch = None
+
+
+def init_worker(threads):
+    """Import the classifiers without the web service; each worker loads them on its first chunk"""
+    global classify_batch
+    import torch
+    import inference
+    # Each worker gets its share of the cores instead of every worker using all of them
+    torch.set_num_threads(threads)
+    classify_batch = inference.classify_batch
+
+
+def score_chunk(index, rows, texts, batch_size, output_dir):
+    """Classify one chunk of texts and write it as one Parquet part file; returns (index, rows scored)"""
+    results = []
+    for start in range(0, len(texts), batch_size):
+        results.extend(classify_batch(texts[start:start + batch_size]))
+    frame = pd.concat([pd.DataFrame(rows), pd.DataFrame(results).add_prefix(PREDICTION_PREFIX)], axis=1)
+    path = part_path(output_dir, index)
+    # Written under a temporary name so an interrupted run never leaves a partial part behind
+    frame.to_parquet(path + ".tmp", engine="pyarrow", index=False)
+    os.replace(path + ".tmp", path)
+    return index, len(frame)
+
+
+def chunk_rows(chunk, text_column, keep_columns=None):
+    """The texts to score and the input columns to keep from one chunk; returns (rows, texts)"""
+    missing = [column for column in [text_column] + (keep_columns or []) if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"no column {', '.join(map(repr, missing))}, found {list(chunk.columns)}")
+    kept = chunk if keep_columns is None else chunk[keep_columns]
+    taken = [column for column in kept.columns if column in PREDICTION_COLUMNS or column == ROW_COLUMN]
+    if taken:
+        raise ValueError(f"input column {', '.join(map(repr, taken))} would be overwritten; leave it out with --keep-columns")
+    texts = chunk[text_column].fillna("").astype(str).tolist()
+    rows = kept.reset_index(drop=True).assign(**{ROW_COLUMN: chunk.index.to_numpy()}).to_dict("list")
+    return rows, texts
+
+
+def part_path(output_dir, index):
+    return os.path.join(output_dir, f"part-{index:05d}.parquet")
+
+
+def read_chunks(path, chunk_size):
+    """DataFrames of up to chunk_size rows from a CSV or JSONL file"""
+    if path.endswith((".jsonl", ".ndjson")):
+        return pd.read_json(path, lines=True, chunksize=chunk_size)
+    return pd.read_csv(path, chunksize=chunk_size)
+
+
+def load_checkpoint(output_dir, settings):
+    """Chunk indexes already written by an earlier run with the same input and chunk size"""
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint["settings"] != settings:
+        raise ValueError(f"{path} was written for {checkpoint['settings']}, not {settings}")
+    # A part file is only trusted if it was renamed into place
+    return {index for index in checkpoint["done"] if os.path.exists(part_path(output_dir, index))}
+
+
+def save_checkpoint(output_dir, settings, done):
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"settings": settings, "done": sorted(done)}, f)
+    os.replace(path + ".tmp", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify a CSV or JSONL complaint corpus offline with the service's models")
+    parser.add_argument("input", help="CSV or JSONL (.jsonl/.ndjson) file, e.g. synthetic_complaints.csv")
+    parser.add_argument("--output", default="scored_complaints", help="directory to write Parquet part files to")
+    parser.add_argument("--text-column", default="complaint", help="column holding the complaint text")
+    parser.add_argument("--keep-columns", nargs="*", default=None,
+                        help="input columns copied to the output (default: all)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows read, scored and written per part file")
+    parser.add_argument("--batch-size", type=int, default=64, help="texts per classify_batch call")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="worker processes, each holding its own copy of the models")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch threads per worker (default: cores divided by workers)")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and score every chunk again")
+    args = parser.parse_args()
+
+    if pyarrow is None:
+        parser.error("Parquet output needs pyarrow: pip install pyarrow")
+    if not os.path.exists(args.input):
+        parser.error(f"{args.input} does not exist")
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+
+    os.makedirs(args.output, exist_ok=True)
+    settings = {"input": os.path.abspath(args.input), "chunk_size": args.chunk_size, "text_column": args.text_column}
+    try:
+        done = set() if args.restart else load_checkpoint(args.output, settings)
+    except ValueError as e:
+        parser.error(f"{e}; use --restart or another --output")
+    if done:
+        print(f"Resuming: {len(done)} chunks already scored in {args.output}")
+
+    scored = 0
+    pending = set()
+    with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(threads,)) as pool:
+        def collect(return_when):
+            nonlocal scored, pending
+            finished, pending = wait(pending, return_when=return_when)
+            for future in finished:
+                index, rows = future.result()
+                done.add(index)
+                scored += rows
+                print(f"Scored chunk {index} ({rows} rows, {scored} this run)")
+            if finished:
+                save_checkpoint(args.output, settings, done)
+
+        for index, chunk in enumerate(read_chunks(args.input, args.chunk_size)):
+            if index in done:
+                continue
+            try:
+                rows, texts = chunk_rows(chunk, args.text_column, args.keep_columns)
+            except ValueError as e:
+                parser.error(f"{args.input}: {e}")
+            pending.add(pool.submit(score_chunk, index, rows, texts, args.batch_size, args.output))
+            # Only a couple of chunks per worker are held in memory at once
+            if len(pending) >= args.workers * 2:
+                collect(FIRST_COMPLETED)
+        while pending:
+            collect(FIRST_COMPLETED)
+
+    print(f"Scored {scored} rows into {args.output} ({len(done)} part files)")
+
+
+if __name__ == "__main__":
+    main()
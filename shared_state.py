@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import threading
+import time
+
+from jobs import PENDING, RUNNING, DONE, FAILED
+
+# Order of job statuses; a status write never moves a job back to an earlier one
+_STATUS_RANK = {PENDING: 0, RUNNING: 1, DONE: 2, FAILED: 2}
+
+
+def _connect(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Losing the last status writes on power failure is harmless, they are rewritten or pruned
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class IdAllocator:
+    """Unique, increasing integers shared by every process using the same SQLite file.
+
+    Each process leases block_size numbers at a time in one short
+    transaction and hands them out from memory, so the shared file is only
+    touched once per block. Numbers are unique across processes and
+    restarts. Each process issues them in increasing order, but processes
+    interleave by block. A sequence that does not exist yet starts at start.
+    """
+
+    def __init__(self, path="data/shared_state.db", name="default", block_size=100, start=1):
+        self.path = path
+        self.name = name
+        self.block_size = max(1, int(block_size))
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self.leases = 0
+        self._conn = _connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS sequences (name TEXT PRIMARY KEY, next_value INTEGER NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO sequences (name, next_value) VALUES (?, ?)", (name, start))
+
+    def try_next(self):
+        """Next number from the leased block without touching the file, or None when the block is used up"""
+        with self._lock:
+            if self._next >= self._end:
+                return None
+            value = self._next
+            self._next += 1
+            return value
+
+    def next(self):
+        """Next number, leasing a new block from the file when needed"""
+        with self._lock:
+            if self._next >= self._end:
+                self._lease()
+            value = self._next
+            self._next += 1
+            return value
+
+    def _lease(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent leases queue instead of deadlocking
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            start = self._conn.execute("SELECT next_value FROM sequences WHERE name = ?", (self.name,)).fetchone()[0]
+            self._conn.execute("UPDATE sequences SET next_value = ? WHERE name = ?", (start + self.block_size, self.name))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._next, self._end = start, start + self.block_size
+        self.leases += 1
+
+    def stats(self):
+        with self._lock:
+            return {"block_size": self.block_size, "leases": self.leases, "remaining_in_block": self._end - self._next}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobStateTable:
+    """Status of background jobs in a SQLite table, visible to every worker process.
+
+    Rows mirror Job.to_dict(). Writes may arrive out of order from
+    different threads, so a write that would move a job back to an
+    earlier status is ignored.
+
+    Each write refreshes the row's heartbeat. The process that owns a
+    pending or running job calls heartbeat() while the job is still in its
+    queue. If the heartbeat is older than stale_seconds, the owner stopped
+    or crashed, and get() reports the job as failed. Finished and stale
+    rows older than retention_seconds are pruned every prune_every
+    finished jobs.
+    """
+
+    def __init__(self, path="data/shared_state.db", retention_seconds=86400, stale_seconds=60, prune_every=1000):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.stale_seconds = stale_seconds
+        self.prune_every = prune_every
+        self._lock = threading.Lock()
+        self._finished_since_prune = 0
+        self._conn = _connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_states ("
+            "job_id TEXT PRIMARY KEY, "
+            "status TEXT NOT NULL, "
+            "status_rank INTEGER NOT NULL, "
+            "stage TEXT, "
+            "error TEXT, "
+            "created_at REAL, "
+            "started_at REAL, "
+            "finished_at REAL, "
+            "heartbeat_at REAL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(job_states)")]
+        if "heartbeat_at" not in columns:
+            self._conn.execute("ALTER TABLE job_states ADD COLUMN heartbeat_at REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS job_states_by_finish ON job_states (finished_at)")
+
+    def record(self, job):
+        """Insert or advance a job's row from a Job.to_dict() snapshot"""
+        row = (
+            job["complaint_id"], job["status"], _STATUS_RANK[job["status"]], job.get("stage"), job.get("error"),
+            job.get("created_at"), job.get("started_at"), job.get("finished_at"), time.time(),
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job_states "
+                "(job_id, status, status_rank, stage, error, created_at, started_at, finished_at, heartbeat_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (job_id) DO UPDATE SET status = excluded.status, status_rank = excluded.status_rank, "
+                "stage = excluded.stage, error = excluded.error, started_at = excluded.started_at, "
+                "finished_at = excluded.finished_at, heartbeat_at = excluded.heartbeat_at "
+                "WHERE excluded.status_rank >= job_states.status_rank",
+                row
+            )
+            if job["status"] in (DONE, FAILED):
+                self._finished_since_prune += 1
+                if self._finished_since_prune >= self.prune_every:
+                    self._finished_since_prune = 0
+                    self._prune(time.time() - self.retention_seconds)
+
+    def heartbeat(self, job_ids):
+        """Mark unfinished jobs as still owned by a live process"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE job_states SET heartbeat_at = ? WHERE job_id = ? AND status_rank < ?",
+                    [(now, job_id, _STATUS_RANK[DONE]) for job_id in job_ids]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get(self, job_id):
+        """The job's last recorded state as a Job.to_dict()-shaped dict, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, status, stage, error, created_at, started_at, finished_at, heartbeat_at "
+                "FROM job_states WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, status, stage, error, created_at, started_at, finished_at, heartbeat_at = row
+        if status in (PENDING, RUNNING) and (heartbeat_at or 0) < time.time() - self.stale_seconds:
+            status = FAILED
+            error = "The worker process handling this complaint stopped before finishing it"
+        return {
+            "complaint_id": job_id,
+            "status": status,
+            "stage": stage,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "error": error,
+        }
+
+    def prune(self, finished_before=None):
+        """Delete finished jobs, by default those older than retention_seconds; returns the number deleted"""
+        with self._lock:
+            return self._prune(time.time() - self.retention_seconds if finished_before is None else finished_before)
+
+    def _prune(self, finished_before):
+        # Unfinished rows whose owner is gone stop getting heartbeats and age out the same way
+        return self._conn.execute(
+            "DELETE FROM job_states WHERE COALESCE(finished_at, heartbeat_at) < ?", (finished_before,)
+        ).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
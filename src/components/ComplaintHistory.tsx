@@ -26,27 +26,40 @@ interface Complaint {
   category: string;
   complaint: string;
   response: string;
-  sentiment: string;
-  urgency: string;
-  fraud: string;
+  // null when a fast path template answered without running the classifiers
+  sentiment: string | null;
+  urgency: string | null;
+  fraud: string | null;
   timestamp: number;
 }
 
 const ComplaintHistory = () => {
   const [complaints, setComplaints] = useState<Complaint[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [selectedComplaint, setSelectedComplaint] = useState<Complaint | null>(null);
   const navigate = useNavigate();
 
+  // Newest first; next_cursor continues with older complaints and is null after the last page
+  const fetchPage = async (cursor: string | null) => {
+    const url = cursor
+      ? `http://localhost:8000/complaints?cursor=${encodeURIComponent(cursor)}`
+      : 'http://localhost:8000/complaints?order=desc';
+    const response = await fetch(url);
+    if (!response.ok) {
+      throw new Error('Failed to fetch complaints');
+    }
+    const data = await response.json();
+    return { complaints: (data.complaints || []) as Complaint[], nextCursor: data.next_cursor ?? null };
+  };
+
   const fetchComplaints = async () => {
     setLoading(true);
     try {
-      const response = await fetch('http://localhost:8000/complaints');
-      if (!response.ok) {
-        throw new Error('Failed to fetch complaints');
-      }
-      const data = await response.json();
-      setComplaints(data.complaints || []);
+      const page = await fetchPage(null);
+      setComplaints(page.complaints);
+      setNextCursor(page.nextCursor);
     } catch (error) {
       console.error('Error fetching complaints:', error);
     } finally {
@@ -54,12 +67,26 @@ const ComplaintHistory = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(nextCursor);
+      setComplaints((previous) => [...previous, ...page.complaints]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Error fetching complaints:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchComplaints();
   }, []);
 
-  const getSentimentColor = (sentiment: string) => {
-    switch (sentiment.toLowerCase()) {
+  const getSentimentColor = (sentiment: string | null) => {
+    switch ((sentiment ?? '').toLowerCase()) {
       case 'positive':
         return 'bg-emerald-500/10 text-emerald-500 border-emerald-500/20';
       case 'negative':
@@ -69,14 +96,14 @@ const ComplaintHistory = () => {
     }
   };
 
-  const getUrgencyColor = (urgency: string) => {
-    return urgency.toLowerCase() === 'high' 
+  const getUrgencyColor = (urgency: string | null) => {
+    return (urgency ?? '').toLowerCase() === 'high' 
       ? 'bg-rose-500/10 text-rose-500 border-rose-500/20' 
       : 'bg-emerald-500/10 text-emerald-500 border-emerald-500/20';
   };
 
-  const getFraudColor = (fraud: string) => {
-    return fraud.toLowerCase() === 'fraud' 
+  const getFraudColor = (fraud: string | null) => {
+    return (fraud ?? '').toLowerCase() === 'fraud' 
       ? 'bg-rose-500/10 text-rose-500 border-rose-500/20' 
       : 'bg-emerald-500/10 text-emerald-500 border-emerald-500/20';
   };
@@ -106,7 +133,7 @@ const ComplaintHistory = () => {
           <div className="flex justify-center items-center py-8">
             <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-primary"></div>
           </div>
-        ) : complaints.length === 0 ? (
+        ) : complaints.length === 0 && !nextCursor ? (
           <div className="text-center py-8">
             <p className="text-foreground/70">No complaints have been submitted yet.</p>
           </div>
@@ -132,17 +159,17 @@ const ComplaintHistory = () => {
                     <TableCell>{complaint.category}</TableCell>
                     <TableCell>
                       <Badge variant="outline" className={`${getSentimentColor(complaint.sentiment)}`}>
-                        {complaint.sentiment}
+                        {complaint.sentiment ?? 'unclassified'}
                       </Badge>
                     </TableCell>
                     <TableCell>
                       <Badge variant="outline" className={`${getUrgencyColor(complaint.urgency)}`}>
-                        {complaint.urgency}
+                        {complaint.urgency ?? 'unclassified'}
                       </Badge>
                     </TableCell>
                     <TableCell>
                       <Badge variant="outline" className={`${getFraudColor(complaint.fraud)}`}>
-                        {complaint.fraud}
+                        {complaint.fraud ?? 'unclassified'}
                       </Badge>
                     </TableCell>
                     <TableCell>{formatDate(complaint.timestamp)}</TableCell>
@@ -169,6 +196,13 @@ const ComplaintHistory = () => {
                 ))}
               </TableBody>
             </Table>
+            {nextCursor && (
+              <div className="flex justify-center pt-4">
+                <Button onClick={loadMore} size="sm" variant="outline" disabled={loadingMore} className="hover:bg-primary/10">
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+              </div>
+            )}
           </div>
         )}
 
@@ -205,19 +239,19 @@ const ComplaintHistory = () => {
                 <div>
                   <p className="text-xs font-medium text-foreground/70">Sentiment:</p>
                   <Badge variant="outline" className={`${getSentimentColor(selectedComplaint.sentiment)}`}>
-                    {selectedComplaint.sentiment}
+                    {selectedComplaint.sentiment ?? 'unclassified'}
                   </Badge>
                 </div>
                 <div>
                   <p className="text-xs font-medium text-foreground/70">Urgency:</p>
                   <Badge variant="outline" className={`${getUrgencyColor(selectedComplaint.urgency)}`}>
-                    {selectedComplaint.urgency}
+                    {selectedComplaint.urgency ?? 'unclassified'}
                   </Badge>
                 </div>
                 <div>
                   <p className="text-xs font-medium text-foreground/70">Fraud:</p>
                   <Badge variant="outline" className={`${getFraudColor(selectedComplaint.fraud)}`}>
-                    {selectedComplaint.fraud}
+                    {selectedComplaint.fraud ?? 'unclassified'}
                   </Badge>
                 </div>
               </div>
@@ -29,6 +29,10 @@ interface AnalyticsSummary {
 
 const defaultColors = ['#2DD4BF', '#F472B6', '#38BDF8', '#FB923C', '#10B981', '#A78BFA'];
 
+// The fallback counts at most this many of the newest complaints
+const FALLBACK_PAGES = 5;
+const FALLBACK_QUERY = 'limit=1000&fields=category,sentiment,urgency,fraud,timestamp';
+
 const RealTimeAnalytics = () => {
   const [analytics, setAnalytics] = useState<AnalyticsSummary | null>(null);
   const [loading, setLoading] = useState(true);
@@ -53,12 +57,20 @@ const RealTimeAnalytics = () => {
 
   const fetchAndCalculateAnalytics = async () => {
     try {
-      const response = await fetch('http://localhost:8000/complaints');
-      if (!response.ok) {
-        throw new Error('Failed to fetch complaints');
+      // Newest first, so the monthly chart covers the recent months
+      const complaints: any[] = [];
+      let url: string | null = `http://localhost:8000/complaints?order=desc&${FALLBACK_QUERY}`;
+      for (let page = 0; url && page < FALLBACK_PAGES; page++) {
+        const response = await fetch(url);
+        if (!response.ok) {
+          throw new Error('Failed to fetch complaints');
+        }
+        const data = await response.json();
+        complaints.push(...(data.complaints || []));
+        url = data.next_cursor
+          ? `http://localhost:8000/complaints?${FALLBACK_QUERY}&cursor=${encodeURIComponent(data.next_cursor)}`
+          : null;
       }
-      const data = await response.json();
-      const complaints = data.complaints || [];
       
       // Calculate analytics from complaints
       const categoryCounts: Record<string, number> = {};
@@ -74,11 +86,9 @@ const RealTimeAnalytics = () => {
           categoryCounts[complaint.category] = 1;
         }
         
-        // Sentiment counts
-        if (sentimentCounts[complaint.sentiment]) {
-          sentimentCounts[complaint.sentiment]++;
-        } else {
-          sentimentCounts[complaint.sentiment] = 1;
+        // Sentiment counts; fast path complaints without labels are left out
+        if (complaint.sentiment) {
+          sentimentCounts[complaint.sentiment] = (sentimentCounts[complaint.sentiment] || 0) + 1;
         }
         
         // Count urgent and fraud cases
@@ -31,6 +31,26 @@ const ResponseDisplay = ({ complaintId, isLoading, hasNewResponse = false }: Res
     urgency: 0,
     fraud: 0
   });
+  const [streamedText, setStreamedText] = useState('');
+  
+  // Show the response as it is generated instead of waiting for the full text
+  useEffect(() => {
+    if (!complaintId || !isLoading) return;
+    
+    setStreamedText('');
+    const source = new EventSource(`http://localhost:8000/stream-response/${complaintId}`);
+    source.addEventListener('token', (event) => {
+      const chunk = JSON.parse((event as MessageEvent).data);
+      setStreamedText((prev) => prev + chunk);
+    });
+    source.addEventListener('done', (event) => {
+      setResponseData(JSON.parse((event as MessageEvent).data));
+      source.close();
+    });
+    source.addEventListener('error', () => source.close());
+    
+    return () => source.close();
+  }, [complaintId, isLoading]);
   
   useEffect(() => {
     let interval: NodeJS.Timeout;
@@ -62,7 +82,12 @@ const ResponseDisplay = ({ complaintId, isLoading, hasNewResponse = false }: Res
       if (!complaintId || isLoading) return;
       
       try {
-        const response = await fetch(`http://localhost:8000/get-response/${complaintId}`);
+        let response = await fetch(`http://localhost:8000/get-response/${complaintId}`);
+        // 202 means the complaint is still pending or running in the background pipeline
+        while (response.status === 202) {
+          await new Promise((resolve) => setTimeout(resolve, 1000));
+          response = await fetch(`http://localhost:8000/get-response/${complaintId}`);
+        }
         if (!response.ok) {
           throw new Error(`HTTP error! status: ${response.status}`);
         }
@@ -152,6 +177,10 @@ const ResponseDisplay = ({ complaintId, isLoading, hasNewResponse = false }: Res
                 </AlertDescription>
               </Alert>
               
+              {streamedText && (
+                <p className="text-foreground text-sm text-left whitespace-pre-line">{streamedText}</p>
+              )}
+              
               <Progress value={progress} className="h-2 w-full" />
               <p className="text-xs text-foreground/50">{progress}% complete</p>
             </div>
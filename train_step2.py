@@ -3,6 +3,7 @@ from transformers import DistilBertTokenizer, DistilBertForSequenceClassificatio
 import torch
 import numpy as np
 from torch.utils.data import Dataset as TorchDataset, DataLoader
+from keyword_matcher import KeywordMatcher
 
 # Check GPU
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -15,31 +16,37 @@ csv_path = "synthetic_complaints.csv"  # Adjust if needed
 df = pd.read_csv(csv_path)
 print(f"Loaded {len(df)} rows")
 
-# Label functions
-def label_sentiment(complaint):
-    complaint = complaint.lower()
-    if any(word in complaint for word in ["great", "perfect", "thanks", "love"]):
+# Label keywords, compiled once so each complaint is scanned in a single pass for all labels
+LABEL_KEYWORDS = KeywordMatcher({
+    "positive": ["great", "perfect", "thanks", "love"],
+    "negative": ["terrible", "broke", "sorry", "fake"],
+    "urgent": ["urgent", "now", "asap", "days"],
+    "fraud": ["fake", "scam", "suspicious", "spam"],
+})
+
+# Label functions, taking the keyword groups found in a complaint
+def label_sentiment(matched):
+    if "positive" in matched:
         return 0
-    elif any(word in complaint for word in ["terrible", "broke", "sorry", "fake"]):
+    elif "negative" in matched:
         return 1
     return 2
 
-def label_urgency(complaint):
-    complaint = complaint.lower()
-    if any(word in complaint for word in ["urgent", "now", "asap", "days"]):
+def label_urgency(matched):
+    if "urgent" in matched:
         return 0
     return 1
 
-def label_fraud(complaint):
-    complaint = complaint.lower()
-    if any(word in complaint for word in ["fake", "scam", "suspicious", "spam"]):
+def label_fraud(matched):
+    if "fraud" in matched:
         return 0
     return 1
 
 # Apply labels
-df["sentiment"] = df["complaint"].apply(label_sentiment)
-df["urgency"] = df["complaint"].apply(label_urgency)
-df["fraud"] = df["complaint"].apply(label_fraud)
+matched = LABEL_KEYWORDS.groups_many(df["complaint"])
+df["sentiment"] = [label_sentiment(groups) for groups in matched]
+df["urgency"] = [label_urgency(groups) for groups in matched]
+df["fraud"] = [label_fraud(groups) for groups in matched]
 print("Labeled dataset")
 
 # Initialize tokenizer
@@ -0,0 +1,158 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: the migration is not locked across processes
+    fcntl = None
+
+HASH_ALGORITHM = "pbkdf2_sha256"
+
+
+def hash_password(password, iterations):
+    """Hash a password with a random salt, returning a self-describing string"""
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return "$".join([
+        HASH_ALGORITHM,
+        str(iterations),
+        base64.b64encode(salt).decode("ascii"),
+        base64.b64encode(digest).decode("ascii"),
+    ])
+
+
+def verify_password(password, encoded):
+    """Check a password against a string produced by hash_password"""
+    try:
+        algorithm, iterations, salt, expected = encoded.split("$")
+    except (AttributeError, ValueError):
+        return False
+    if algorithm != HASH_ALGORITHM:
+        return False
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), base64.b64decode(salt), int(iterations))
+    return hmac.compare_digest(digest, base64.b64decode(expected))
+
+
+def hash_iterations(encoded):
+    """Return the cost a stored hash was created with"""
+    try:
+        return int(encoded.split("$")[1])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+class UserExistsError(Exception):
+    pass
+
+
+class UserStore:
+    """Users keyed by email in a WAL-mode SQLite table.
+
+    Lookups go through the primary key and each registration is a single
+    durable insert, so neither depends on how many users are registered.
+    """
+
+    def __init__(self, path="data/users.db"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "email TEXT PRIMARY KEY, "
+            "username TEXT NOT NULL, "
+            "password_hash TEXT NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+
+    def add(self, username, email, password_hash, created_at):
+        """Insert a user; raises UserExistsError if the email is taken"""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO users (email, username, password_hash, created_at) VALUES (?, ?, ?, ?)",
+                    (email, username, password_hash, created_at)
+                )
+        except sqlite3.IntegrityError:
+            raise UserExistsError(email)
+
+    def add_many(self, users):
+        """Insert (username, email, password_hash, created_at) tuples in one transaction, skipping taken emails"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO users (username, email, password_hash, created_at) VALUES (?, ?, ?, ?)",
+                    users
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get(self, email):
+        """Return the user with this email as a dict, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT username, email, password_hash, created_at FROM users WHERE email = ?", (email,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"username": row[0], "email": row[1], "password_hash": row[2], "created_at": row[3]}
+
+    def update_password_hash(self, email, password_hash):
+        with self._lock:
+            self._conn.execute("UPDATE users SET password_hash = ? WHERE email = ?", (password_hash, email))
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_users_json(json_path, store, iterations):
+    """Import users from a legacy users.json, hashing their plaintext passwords; returns the count.
+
+    Once the import has committed, the legacy file is replaced by a copy
+    without the password fields at json_path + ".migrated", so no plaintext
+    password stays on disk. Users already in the store are left as they are,
+    so running this again after an interrupted scrub is harmless.
+
+    Every worker process runs this at startup. An exclusive lock on a file
+    beside the store lets only one of them migrate; the others find the
+    legacy file gone and return 0.
+    """
+    with open(store.path + ".migrate.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                with open(json_path, "r") as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                return 0
+            users = data.get("users", [])
+            store.add_many([
+                (user["username"], user["email"], hash_password(user["password"], iterations), user.get("created_at", 0))
+                for user in users
+            ])
+            scrubbed = dict(data, users=[{k: v for k, v in user.items() if k != "password"} for user in users])
+            with open(json_path + ".migrated.tmp", "w") as f:
+                json.dump(scrubbed, f, indent=2)
+            os.replace(json_path + ".migrated.tmp", json_path + ".migrated")
+            os.remove(json_path)
+            return len(users)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)